@@ -4,24 +4,24 @@ A Discord bot with various utility commands including IP lookup, domain search,
 Minecraft server status, and more.
 """
 
+import hashlib
+import importlib
+import json
 import os
-from dotenv import load_dotenv
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-# Import command handlers
-from commands import (
-  say_command, status_command, roll_command, info_command,
-  bincheck_command, domain_command, registrars_command,
-  ipdetail_command, iplocation_command, mcserver_command,
-  zipcode_command, whois_command, add_monitor_command, 
-  remove_monitor_command, list_monitors_command, check_domains_now_command
-)
+# Imported only to load .env (commands.utils does it once for the whole bot) before
+# the os.getenv calls below. A plain `import commands.utils` would rebind `commands`,
+# which here is discord.ext.commands
+importlib.import_module('commands.utils')
 
-# Load environment variables
-load_dotenv('.env')
+# Command handlers are resolved on first use (see commands/__init__.py)
+import commands as command_handlers
+from commands.shards.script import shard_stats, parse_shard_ids, build_bot_options
+from commands.http_client import close_session
 
 # Configuration
 TOKEN = os.getenv('TOKEN')
@@ -29,6 +29,13 @@ DEFAULT_CUSTOM_STATUS = os.getenv('default_custom_status')
 DEFAULT_STATUS = os.getenv('default_status')
 DEFAULT_VERSION = os.getenv('default_version')
 SETTING_VERSION = os.getenv('setting_version')
+# Sharding (opt-in): let discord.py pick the shard count, or set SHARD_COUNT,
+# and optionally SHARD_IDS to run only part of the shards in this process
+SHARDED = os.getenv('SHARDED', 'false').lower() == 'true'
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS'))
+# Hash of the last synced command tree; delete the file to force a sync
+COMMAND_TREE_HASH_FILE = os.getenv('COMMAND_TREE_HASH_FILE', '.command_tree.hash')
 
 # Bot information
 BOT_VERSION = "v1.0.0"
@@ -37,7 +44,13 @@ BOT_TYPE = "Release Build"
 
 # Bot setup
 intents = discord.Intents.all()
-client = commands.Bot(command_prefix='!', intents=intents)
+if SHARDED:
+    client = commands.AutoShardedBot(
+        command_prefix='!', intents=intents, **build_bot_options(SHARD_COUNT, SHARD_IDS)
+    )
+else:
+    client = commands.Bot(command_prefix='!', intents=intents)
+shard_stats.attach(client)
 
 # Global variable for domain monitor
 domain_monitor = None
@@ -53,44 +66,93 @@ def get_status_from_string(status_string: str) -> discord.Status:
     return status_map.get(status_string, discord.Status.online)
 
 
-@client.event
-async def on_ready():
-    """Event handler for when the bot is ready."""
-    global domain_monitor
-    
-    print("Bot is ready for use!")
-    
-    # Set bot status
-    status = get_status_from_string(DEFAULT_STATUS)
-    activity = discord.Game(DEFAULT_CUSTOM_STATUS)
-    await client.change_presence(status=status, activity=activity)
-    
-    # Sync slash commands
+def get_command_tree_hash() -> str:
+    """Hash the global command tree as it would be sent to Discord."""
+    payload = [command.to_dict(client.tree) for command in client.tree.get_commands()]
+    payload.sort(key=lambda command: command['name'])
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def sync_commands_if_changed():
+    """Sync slash commands only if the tree changed since the last successful sync."""
+    # Keyed by application so bots sharing a working directory don't mix up hashes
+    tree_hash = f"{client.application_id}:{get_command_tree_hash()}"
+    try:
+        with open(COMMAND_TREE_HASH_FILE, 'r', encoding='utf-8') as f:
+            if f.read().strip() == tree_hash:
+                print("Command tree unchanged, skipping sync")
+                return
+    except FileNotFoundError:
+        pass
+
     try:
         synced = await client.tree.sync()
         print(f"Synced {len(synced)} command(s)")
     except Exception as e:
         print(f"Failed to sync commands: {e}")
+        return
+
+    with open(COMMAND_TREE_HASH_FILE, 'w', encoding='utf-8') as f:
+        f.write(tree_hash)
+
+
+async def setup_hook():
+    """One-time setup after login, before the gateway connects; reconnects don't repeat it."""
+    global domain_monitor
     
-    # Setup domain monitoring after bot is ready
+    await sync_commands_if_changed()
+    
+    # Setup domain monitoring once; its loop waits for the bot to be ready
     try:
         from commands.whois.monitor import setup_domain_monitor
         domain_monitor = setup_domain_monitor(client)
         print("Domain monitoring system initialized")
         
-        # Perform startup domain check
-        await domain_monitor.check_on_startup()
-        print("Startup domain check completed")
-        
+        # Startup domain check runs in the background once the bot is ready
+        domain_monitor.start_startup_check()
     except Exception as e:
         print(f"Failed to initialize domain monitoring: {e}")
 
+    # Keep registrar prices loaded in memory so /domain and /registrars rarely wait on the API
+    from commands.domain.script import price_snapshot_loop
+    price_snapshot_loop.start()
+
+client.setup_hook = setup_hook
+
+_client_close = client.close
+
+
+async def close():
+    """Stop background monitor and price work before the bot disconnects."""
+    if domain_monitor is not None:
+        await domain_monitor.stop()
+    from commands.domain.script import price_snapshot_loop
+    price_snapshot_loop.cancel()
+    await close_session()
+    await _client_close()
+
+client.close = close
+
+
+@client.event
+async def on_ready():
+    """Event handler for when the bot is ready (fires again after every reconnect)."""
+    if SHARDED:
+        print(f"Bot is ready for use! Running shards {sorted(client.shards)} of {client.shard_count}")
+    else:
+        print("Bot is ready for use!")
+    
+    # Set bot status
+    status = get_status_from_string(DEFAULT_STATUS)
+    activity = discord.Game(DEFAULT_CUSTOM_STATUS)
+    await client.change_presence(status=status, activity=activity)
+
 
 @client.tree.command(name="say", description="Let bot say something.")
 @app_commands.describe(things_to_say="What should I say?")
 async def say(interaction: discord.Interaction, things_to_say: str):
     """Make the bot say something."""
-    await say_command(interaction, things_to_say)
+    await command_handlers.say_command(interaction, things_to_say)
 
 
 @client.tree.command(name="status", description="Change the bot's status")
@@ -103,13 +165,13 @@ async def say(interaction: discord.Interaction, things_to_say: str):
 )
 async def status(interaction: discord.Interaction, choices: app_commands.Choice[str], *, custom_status_message: str):
     """Change the bot's status and custom message."""
-    await status_command(interaction, choices, custom_status_message, client)
+    await command_handlers.status_command(interaction, choices, custom_status_message, client)
 
 
 @client.tree.command(name='roll', description='Roll a dice.')
 async def roll(interaction: discord.Interaction):
     """Roll a six-sided dice."""
-    await roll_command(interaction)
+    await command_handlers.roll_command(interaction)
 
 
 @client.tree.command(name='zipcode', description='Search address from zipcode')
@@ -120,19 +182,19 @@ async def roll(interaction: discord.Interaction):
 )
 async def zipcode(interaction: discord.Interaction, country: app_commands.Choice[str], zipcodes: str):
     """Search for address information using a zipcode."""
-    await zipcode_command(interaction, country, zipcodes)
+    await command_handlers.zipcode_command(interaction, country, zipcodes)
 
 
 @client.tree.command(name='ipdetail', description="Show details from IP address")
 async def ipdetail(interaction: discord.Interaction, ipaddress: str):
     """Get detailed information about an IP address."""
-    await ipdetail_command(interaction, ipaddress)
+    await command_handlers.ipdetail_command(interaction, ipaddress)
 
 
 @client.tree.command(name='iplocation', description="Show geolocation from IP address")
 async def iplocation(interaction: discord.Interaction, ipaddress: str):
     """Get geolocation information for an IP address."""
-    await iplocation_command(interaction, ipaddress)
+    await command_handlers.iplocation_command(interaction, ipaddress)
 
 
 @client.tree.command(name='domain', description='Find the cheapest domain registrar')
@@ -143,9 +205,21 @@ async def iplocation(interaction: discord.Interaction, ipaddress: str):
         app_commands.Choice(name='Transfer', value='transfer'),
     ]
 )
-async def domain(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
-    """Find the cheapest domain registrar for a given TLD."""
-    await domain_command(interaction, tld, order)
+@app_commands.describe(
+    tld="A TLD, or several separated by commas to compare them",
+    top="How many results to show",
+    currency="Only show prices in this currency, e.g. USD"
+)
+async def domain(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str],
+                 top: app_commands.Range[int, 1, 10] = 5, currency: str = None):
+    """Find the cheapest domain registrar for one or more TLDs."""
+    await command_handlers.domain_command(interaction, tld, order, top, currency)
+
+
+@domain.autocomplete('tld')
+async def domain_tld_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest TLDs from the loaded price table."""
+    return await command_handlers.tld_autocomplete(interaction, current)
 
 
 @client.tree.command(name='registrars', description='Search domains by registrar')
@@ -156,9 +230,51 @@ async def domain(interaction: discord.Interaction, tld: str, order: app_commands
         app_commands.Choice(name='Transfer', value='transfer'),
     ],
 )
-async def registrars(interaction: discord.Interaction, registrar: str, order: app_commands.Choice[str]):
+@app_commands.describe(top="How many results to show", currency="Only show prices in this currency, e.g. USD")
+async def registrars(interaction: discord.Interaction, registrar: str, order: app_commands.Choice[str],
+                     top: app_commands.Range[int, 1, 10] = 5, currency: str = None):
     """Search for domain prices from a specific registrar."""
-    await registrars_command(interaction, registrar, order)
+    await command_handlers.registrars_command(interaction, registrar, order, top, currency)
+
+
+@registrars.autocomplete('registrar')
+async def registrars_registrar_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest registrars from the loaded price table."""
+    return await command_handlers.registrar_autocomplete(interaction, current)
+
+
+ORDER_CHOICES = [
+    app_commands.Choice(name='New', value='new'),
+    app_commands.Choice(name='Renew', value='renew'),
+    app_commands.Choice(name='Transfer', value='transfer'),
+]
+
+
+@client.tree.command(name='price-watch-add', description='Get alerted when prices of a TLD change')
+@app_commands.choices(order=ORDER_CHOICES)
+async def price_watch_add(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
+    """Watch a TLD's prices for one order type."""
+    await command_handlers.add_price_watch_command(interaction, tld, order)
+
+
+@client.tree.command(name='price-watch-remove', description='Stop price alerts for a TLD')
+@app_commands.choices(order=ORDER_CHOICES)
+async def price_watch_remove(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
+    """Stop watching a TLD's prices for one order type."""
+    await command_handlers.remove_price_watch_command(interaction, tld, order)
+
+
+@client.tree.command(name='price-watch-list', description='List the TLD prices you watch')
+async def price_watch_list(interaction: discord.Interaction):
+    """List the TLD prices you watch."""
+    await command_handlers.list_price_watches_command(interaction)
+
+
+@price_watch_add.autocomplete('tld')
+@price_watch_remove.autocomplete('tld')
+async def price_watch_tld_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest TLDs from the loaded price table."""
+    return await command_handlers.tld_autocomplete(interaction, current)
 
 
 @client.tree.command(name='mcserver', description='Get details of a Minecraft server')
@@ -170,49 +286,69 @@ async def registrars(interaction: discord.Interaction, registrar: str, order: ap
 )
 async def mcserver(interaction: discord.Interaction, server_type: app_commands.Choice[str], ipaddress: str):
     """Get information about a Minecraft server."""
-    await mcserver_command(interaction, server_type, ipaddress)
+    await command_handlers.mcserver_command(interaction, server_type, ipaddress)
 
 
 @client.tree.command(name='bincheck', description="Check card issuer and country from BIN")
 async def bincheck(interaction: discord.Interaction, bin_code: int):
     """Check card information from BIN (Bank Identification Number)."""
-    await bincheck_command(interaction, bin_code)
+    await command_handlers.bincheck_command(interaction, bin_code)
 
 
 @client.tree.command(name='info', description="Information about this bot")
 async def info(interaction: discord.Interaction):
     """Display bot information and credits."""
-    await info_command(interaction, BOT_VERSION, BOT_BUILD, SETTING_VERSION, BOT_TYPE)
+    await command_handlers.info_command(interaction, BOT_VERSION, BOT_BUILD, SETTING_VERSION, BOT_TYPE)
+
+
+@client.tree.command(name='shards', description='Show gateway latency and load per shard')
+async def shards(interaction: discord.Interaction):
+    """Show per-shard latency, event rate and guild count."""
+    await command_handlers.shards_command(interaction, client)
+
+
+@client.tree.command(name='upstream-status', description='Show the health of the upstream APIs')
+async def upstream_status(interaction: discord.Interaction):
+    """Show circuit breaker state and failure rates per upstream."""
+    await command_handlers.upstream_status_command(interaction)
 
 
 @client.tree.command(name='whois', description='Get domain whois information')
 async def whois(interaction: discord.Interaction, domain: str):
     """Get whois information for a domain."""
-    await whois_command(interaction, domain)
+    await command_handlers.whois_command(interaction, domain)
 
 
 @client.tree.command(name='domain-monitor-add', description='Add a domain to monitoring list')
 async def domain_monitor_add(interaction: discord.Interaction, domain: str):
     """Add a domain to your monitoring list."""
-    await add_monitor_command(interaction, domain)
+    await command_handlers.add_monitor_command(interaction, domain)
 
 
 @client.tree.command(name='domain-monitor-remove', description='Remove a domain from monitoring list')
 async def domain_monitor_remove(interaction: discord.Interaction, domain: str):
     """Remove a domain from your monitoring list."""
-    await remove_monitor_command(interaction, domain)
+    await command_handlers.remove_monitor_command(interaction, domain)
 
 
 @client.tree.command(name='domain-monitor-list', description='List your monitored domains')
-async def domain_monitor_list(interaction: discord.Interaction):
+@app_commands.describe(page="Page of the list to show, 25 domains per page")
+async def domain_monitor_list(interaction: discord.Interaction, page: app_commands.Range[int, 1] = 1):
     """List all your monitored domains."""
-    await list_monitors_command(interaction)
+    await command_handlers.list_monitors_command(interaction, page)
+
+
+@client.tree.command(name='domain-monitor-import', description='Import domains to monitor from a txt or CSV file')
+@app_commands.describe(file="A .txt or .csv file with one domain per line")
+async def domain_monitor_import(interaction: discord.Interaction, file: discord.Attachment):
+    """Add every domain in an uploaded file to your monitoring list."""
+    await command_handlers.import_monitors_command(interaction, file)
 
 
 @client.tree.command(name='check-domains-now', description='Manually check domains now')
 async def check_domains_now(interaction: discord.Interaction):
     """Manually check domains now."""
-    await check_domains_now_command(interaction)
+    await command_handlers.check_domains_now_command(interaction)
 
 
 if __name__ == "__main__":
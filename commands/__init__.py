@@ -1,46 +1,63 @@
-# Import all command handlers
-from .basic.handler import say_command, status_command, roll_command, info_command
-from .bincheck.handler import bincheck_command
-from .domain.handler import domain_command, registrars_command
-from .ipaddress.handler import ipdetail_command, iplocation_command
-from .minecraft.handler import mcserver_command
-from .zipcode.handler import zipcode_command
-from .whois.handler import whois_command, add_monitor_command, remove_monitor_command, list_monitors_command, check_domains_now_command
-
-# Import all script functions for compatibility
-from .bincheck.script import binCheckRequest as bin_check_request
-from .domain.script import cheapest, registrarSearch as registrar_search
-from .ipaddress.script import ipdetails, iplocations
-from .minecraft.script import minecraftServer
-from .zipcode.script import searchZipCodeJP as search_zipcode_jp
-from .whois.script import checkWhois
-
-__all__ = [
+# Command handlers and script functions are imported on first use, so the bot
+# can register its slash commands without loading the Cloudflare SDK and every
+# command package at startup
+import importlib
+
+# Exported name -> (module, attribute)
+_LAZY_ATTRIBUTES = {
     # Command handlers
-    'say_command',
-    'status_command', 
-    'roll_command',
-    'info_command',
-    'bincheck_command',
-    'domain_command',
-    'registrars_command',
-    'ipdetail_command',
-    'iplocation_command',
-    'mcserver_command',
-    'zipcode_command',
-    'whois_command',
-    'add_monitor_command',
-    'remove_monitor_command',
-    'list_monitors_command',
-    'check_domains_now_command',
-    
+    'say_command': ('.basic.handler', 'say_command'),
+    'status_command': ('.basic.handler', 'status_command'),
+    'roll_command': ('.basic.handler', 'roll_command'),
+    'info_command': ('.basic.handler', 'info_command'),
+    'bincheck_command': ('.bincheck.handler', 'bincheck_command'),
+    'domain_command': ('.domain.handler', 'domain_command'),
+    'registrars_command': ('.domain.handler', 'registrars_command'),
+    'tld_autocomplete': ('.domain.handler', 'tld_autocomplete'),
+    'registrar_autocomplete': ('.domain.handler', 'registrar_autocomplete'),
+    'add_price_watch_command': ('.domain.handler', 'add_price_watch_command'),
+    'remove_price_watch_command': ('.domain.handler', 'remove_price_watch_command'),
+    'list_price_watches_command': ('.domain.handler', 'list_price_watches_command'),
+    'ipdetail_command': ('.ipaddress.handler', 'ipdetail_command'),
+    'iplocation_command': ('.ipaddress.handler', 'iplocation_command'),
+    'mcserver_command': ('.minecraft.handler', 'mcserver_command'),
+    'zipcode_command': ('.zipcode.handler', 'zipcode_command'),
+    'whois_command': ('.whois.handler', 'whois_command'),
+    'add_monitor_command': ('.whois.handler', 'add_monitor_command'),
+    'remove_monitor_command': ('.whois.handler', 'remove_monitor_command'),
+    'list_monitors_command': ('.whois.handler', 'list_monitors_command'),
+    'check_domains_now_command': ('.whois.handler', 'check_domains_now_command'),
+    'import_monitors_command': ('.whois.handler', 'import_monitors_command'),
+    'shards_command': ('.shards.handler', 'shards_command'),
+    'upstream_status_command': ('.upstream.handler', 'upstream_status_command'),
+
     # Script functions (for compatibility)
-    'bin_check_request',
-    'cheapest',
-    'registrar_search',
-    'ipdetails',
-    'iplocations',
-    'minecraftServer',
-    'search_zipcode_jp',
-    'checkWhois'
-]
+    'bin_check_request': ('.bincheck.script', 'binCheckRequest'),
+    'cheapest': ('.domain.script', 'cheapest'),
+    'registrar_search': ('.domain.script', 'registrarSearch'),
+    'ipdetails': ('.ipaddress.script', 'ipdetails'),
+    'iplocations': ('.ipaddress.script', 'iplocations'),
+    'minecraftServer': ('.minecraft.script', 'minecraftServer'),
+    'search_zipcode_jp': ('.zipcode.script', 'searchZipCodeJP'),
+    'checkWhois': ('.whois.script', 'checkWhois'),
+}
+
+
+def __getattr__(name):
+    """Import an exported handler or script function the first time it's used."""
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+__all__ = list(_LAZY_ATTRIBUTES)
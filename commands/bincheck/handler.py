@@ -7,7 +7,7 @@ async def bincheck_command(interaction: discord.Interaction, bin_code: int):
     """Check card information from BIN (Bank Identification Number)."""
     await interaction.response.defer(ephemeral=True)
     
-    result = binCheckRequest(bin_code)
+    result = await binCheckRequest(bin_code)
     if result is None:
         await interaction.followup.send("Request error or BIN code doesn't exist")
         return
@@ -1,9 +1,9 @@
-import requests
 from typing import Optional, Dict, Any
+from ..http_client import post_json, UpstreamError
 from ..utils import *
 
 
-def binCheckRequest(bin_code: int) -> Optional[Dict[str, Any]]:
+async def binCheckRequest(bin_code: int) -> Optional[Dict[str, Any]]:
   if not BINCHECK_API_KEY:
     print("BIN check API key not configured")
     return None
@@ -17,9 +17,7 @@ def binCheckRequest(bin_code: int) -> Optional[Dict[str, Any]]:
   }
   
   try:
-    response = requests.post(base, json=payload, headers=headers)
-    response.raise_for_status()
-    data = response.json()
+    data = await post_json(base, json=payload, headers=headers)
     
     if data.get("code") == 200 and "BIN" in data:
       bin_data = data["BIN"]
@@ -39,7 +37,7 @@ def binCheckRequest(bin_code: int) -> Optional[Dict[str, Any]]:
     
     return None
     
-  except requests.exceptions.RequestException as e:
+  except UpstreamError as e:
     print(f"Error in BIN check API request: {e}")
     return None
   except KeyError as e:
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Awaitable, Callable, Hashable, Iterable, List, Tuple
+
+
+class StaleWhileRevalidateCache:
+    """
+    Response cache that serves stale entries while refreshing them in the background.
+    Entries younger than `ttl` are served as-is. Older ones, up to `stale_ttl`, are
+    served immediately while one background refresh replaces them. Past that the
+    caller waits for a refresh, and if the upstream fails, whatever entry is left
+    is served instead of nothing. Failed fetches (None) are never cached.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # key -> (fetched_at, value)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # key -> version at which its entry was stored
+        self._stored_versions: Dict[Hashable, int] = {}
+        # key -> when its entry was last asked for, so unused entries can be dropped
+        self._used_at: Dict[Hashable, float] = {}
+        # key -> in-flight fetch, so concurrent misses share one upstream call
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        # Bumped whenever an entry is stored, so derived data knows to rebuild
+        self.version = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Optional[Any], float]:
+        """Get (value, age in seconds) for a key, fetching it with `fetch` when needed."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None:
+            fetched_at, value = entry
+            age = now - fetched_at
+            self._used_at[key] = now
+            self._entries.move_to_end(key)
+            if age < self.ttl:
+                self.hits += 1
+                return value, age
+            if age < self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, fetch)
+                return value, age
+
+        self.misses += 1
+        # Shielded so a cancelled caller doesn't cancel a fetch others may be waiting on
+        value = await asyncio.shield(self._refresh(key, fetch))
+        if value is not None:
+            # Only keys with an entry are tracked, so failed lookups leave nothing behind
+            self._used_at[key] = now
+            return value, 0.0
+
+        # Upstream failed: an old answer is better than none
+        if entry is not None:
+            fetched_at, value = entry
+            return value, now - fetched_at
+        return None, 0.0
+
+    async def refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        """Fetch a key now (joining a fetch already in flight), keeping the old entry on failure."""
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Get a key's cached value, however old, without fetching or counting a lookup."""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def age(self, key: Hashable) -> Optional[float]:
+        """Get the age of a key's entry in seconds, or None if it isn't cached."""
+        entry = self._entries.get(key)
+        return time.monotonic() - entry[0] if entry is not None else None
+
+    def stored_version(self, key: Hashable) -> Optional[int]:
+        """Get the cache version at which a key's entry was stored, or None if it isn't cached."""
+        return self._stored_versions.get(key)
+
+    def keys(self) -> List[Hashable]:
+        """Get the cached keys, least recently used first."""
+        return list(self._entries)
+
+    def values(self) -> List[Any]:
+        """Get the cached values, least recently used first."""
+        return [value for _, value in self._entries.values()]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Get the cached (key, value) pairs, least recently used first."""
+        return [(key, value) for key, (_, value) in self._entries.items()]
+
+    def evict_idle(self, max_idle: float, keep: Iterable[Hashable] = ()) -> int:
+        """Drop entries nobody has asked for in `max_idle` seconds, except `keep`; returns how many."""
+        keep = set(keep)
+        cutoff = time.monotonic() - max_idle
+        idle = [
+            key for key in self._entries
+            if key not in keep and self._used_at.get(key, 0.0) < cutoff
+        ]
+        for key in idle:
+            del self._entries[key]
+            self._used_at.pop(key, None)
+            self._stored_versions.pop(key, None)
+        # Entries dropped elsewhere (e.g. by a refresh that was already running) leave no trace
+        for key in self._used_at.keys() - self._entries.keys():
+            del self._used_at[key]
+        if idle:
+            self.version += 1
+        return len(idle)
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start (or join) the fetch for a key; the task stores its result when done."""
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch))
+            self._refreshing[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Optional[Any]:
+        try:
+            value = await fetch()
+        except Exception as e:
+            print(f"Error refreshing cached response for {key}: {e}")
+            value = None
+        finally:
+            self._refreshing.pop(key, None)
+
+        if value is None:
+            self.refresh_failures += 1
+            return None
+
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._used_at.pop(evicted, None)
+            self._stored_versions.pop(evicted, None)
+        self.version += 1
+        self._stored_versions[key] = self.version
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters and entry ages for reporting."""
+        lookups = self.hits + self.stale_hits + self.misses
+        now = time.monotonic()
+        ages = [now - fetched_at for fetched_at, _ in self._entries.values()]
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_failures": self.refresh_failures,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "oldest_age": max(ages) if ages else 0.0,
+            "mean_age": sum(ages) / len(ages) if ages else 0.0,
+        }
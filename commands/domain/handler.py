@@ -1,70 +1,218 @@
 import discord
 from discord import app_commands
-from .script import cheapest, registrarSearch as registrar_search
+import re
+from .script import (
+    cheapest, compareTlds as compare_tlds, registrarSearch as registrar_search,
+    completeTlds as complete_tlds, completeRegistrars as complete_registrars
+)
 
+# Most TLDs one /domain command compares at once
+MAX_COMPARE_TLDS = 10
 
-async def domain_command(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
-    """Find the cheapest domain registrar for a given TLD."""
+# Discord shows at most 25 autocomplete choices, each at most 100 characters
+MAX_CHOICES = 25
+MAX_CHOICE_LENGTH = 100
+
+
+def format_price_age(age: float) -> str:
+    """Note how old cached prices are, once they're more than a minute old."""
+    if age < 60:
+        return ""
+    if age < 3600:
+        return f"\n-# Prices as of {int(age // 60)} min ago"
+    return f"\n-# Prices as of {int(age // 3600)} h ago"
+
+
+def ordinal(n: int) -> str:
+    """Get the ordinal for a rank, e.g. 1st, 2nd, 11th."""
+    if 10 <= n % 100 <= 20:
+        return f"{n}th"
+    return f"{n}{ {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}"
+
+
+async def domain_command(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str],
+                         top: int = 5, currency: str = None):
+    """Find the cheapest domain registrar for a given TLD, or compare several."""
     await interaction.response.defer(ephemeral=True)
-    
-    result = cheapest(tld, order.value)
+
+    tlds = list(dict.fromkeys(name.lower().lstrip('.') for name in re.split(r'[\s,]+', tld) if name.strip('.')))
+    if len(tlds) > MAX_COMPARE_TLDS:
+        await interaction.followup.send(f"Please compare at most {MAX_COMPARE_TLDS} TLDs at once")
+        return
+    if len(tlds) > 1:
+        await send_tld_comparison(interaction, tlds, order, currency)
+        return
+
+    result = await cheapest(tlds[0] if tlds else tld, order.value, top, currency)
     if result is None:
         await interaction.followup.send("Invalid input or internal error")
         return
 
-    def format_registrar_info(num: str) -> str:
+    def format_registrar_info(rank: int, price: dict) -> str:
         """Format registrar information for display."""
         return (
-            f"### {num}:\n"
-            f"- **Registrar**: {result[f'reg_{num}']}\n"
-            f"- **Currency**: {result[f'currency_{num}']}\n"
-            f"- **New**: {result[f'new_{num}']}\n"
-            f"- **Renew**: {result[f'renew_{num}']}\n"
-            f"- **Transfer**: {result[f'transfer_{num}']}\n"
-            f"- **Website**: {result[f'reg_web_{num}']}\n"
+            f"### {ordinal(rank)}:\n"
+            f"- **Registrar**: {price['registrar']}\n"
+            f"- **Currency**: {price['currency']}\n"
+            f"- **New**: {price['new']}\n"
+            f"- **Renew**: {price['renew']}\n"
+            f"- **Transfer**: {price['transfer']}\n"
+            f"- **Website**: {price['registrar_web']}\n"
         )
 
     message = (
         f"## Domain Registrar Comparison\n"
         f"**TLD**: {result['domain']} | **Order**: {result['order']}\n\n"
-        f"{format_registrar_info('1st')}"
-        f"{format_registrar_info('2nd')}"
-        f"{format_registrar_info('3rd')}"
-        f"{format_registrar_info('4th')}"
-        f"{format_registrar_info('5th')}"
+        + "".join(format_registrar_info(rank, price) for rank, price in enumerate(result['prices'], 1))
+        + format_price_age(result['age'])
     )
 
     await interaction.followup.send(message)
 
 
-async def registrars_command(interaction: discord.Interaction, registrar: str, order: app_commands.Choice[str]):
+async def send_tld_comparison(interaction: discord.Interaction, tlds: list, order: app_commands.Choice[str],
+                              currency: str = None):
+    """Send the cheapest registrar for each TLD as one compact comparison."""
+    result = await compare_tlds(tlds, order.value, currency)
+    if not any(result['prices'].values()):
+        await interaction.followup.send("Invalid input or internal error")
+        return
+
+    lines = []
+    for name, price in result['prices'].items():
+        if price is None:
+            lines.append(f"- **.{name}**: No prices found")
+        else:
+            lines.append(
+                f"- **.{name}**: {price[order.value]} {price['currency']} at "
+                f"{price['registrar']} ({price['registrar_web']})"
+            )
+
+    message = (
+        f"## Domain Price Comparison\n"
+        f"**Order**: {result['order']}\n\n"
+        + "\n".join(lines) + "\n"
+        + format_price_age(result['age'])
+    )
+
+    await interaction.followup.send(message)
+
+
+async def registrars_command(interaction: discord.Interaction, registrar: str, order: app_commands.Choice[str],
+                             top: int = 5, currency: str = None):
     """Search for domain prices from a specific registrar."""
     await interaction.response.defer(ephemeral=True)
     
-    result = registrar_search(registrar, order.value)
+    result = await registrar_search(registrar, order.value, top, currency)
     if result is None:
         await interaction.followup.send("Invalid input or internal error")
         return
 
-    def format_domain_info(num: str) -> str:
+    def format_domain_info(rank: int, price: dict) -> str:
         """Format domain information for display."""
         return (
-            f"### {num}:\n"
-            f"**Domain**: {result[f'domain_{num}']}\n"
-            f"**New**: {result[f'new_{num}']}\n"
-            f"**Renew**: {result[f'renew_{num}']}\n"
-            f"**Transfer**: {result[f'transfer_{num}']}\n"
-            f"**Currency**: {result[f'currency_{num}']}\n"
+            f"### {ordinal(rank)}:\n"
+            f"**Domain**: {price['tld']}\n"
+            f"**New**: {price['new']}\n"
+            f"**Renew**: {price['renew']}\n"
+            f"**Transfer**: {price['transfer']}\n"
+            f"**Currency**: {price['currency']}\n"
         )
 
     message = (
         f"## Domain Prices by Registrar\n"
         f"**Registrar**: {result['reg']} | **Website**: {result['reg_web']} | **Order**: {result['order']}\n\n"
-        f"{format_domain_info('1st')}"
-        f"{format_domain_info('2nd')}"
-        f"{format_domain_info('3rd')}"
-        f"{format_domain_info('4th')}"
-        f"{format_domain_info('5th')}"
+        + "".join(format_domain_info(rank, price) for rank, price in enumerate(result['prices'], 1))
+        + format_price_age(result['age'])
     )
 
-    await interaction.followup.send(message) 
\ No newline at end of file
+    await interaction.followup.send(message)
+
+
+async def tld_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest known TLDs, completing the last one in a comma-separated list."""
+    head, _, last = current.rpartition(',')
+    head = f"{head}, " if head else ""
+    choices = []
+    for tld in complete_tlds(last, MAX_CHOICES):
+        value = f"{head}{tld}"
+        if len(value) <= MAX_CHOICE_LENGTH:
+            choices.append(app_commands.Choice(name=value, value=value))
+    return choices
+
+
+async def registrar_autocomplete(interaction: discord.Interaction, current: str):
+    """Suggest known registrars."""
+    return [
+        app_commands.Choice(name=name[:MAX_CHOICE_LENGTH], value=key[:MAX_CHOICE_LENGTH])
+        for key, name in complete_registrars(current, MAX_CHOICES)
+    ]
+
+
+async def add_price_watch_command(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
+    """Watch a TLD's prices for one order type."""
+    await interaction.response.defer(ephemeral=True)
+    from .watch import addPriceWatch as add_price_watch
+
+    try:
+        added = await add_price_watch(tld, order.value, interaction.user.id)
+        name = tld.strip().lower().lstrip('.')
+        if added is None:
+            await interaction.followup.send(f"❌ No prices found for `.{name}`")
+        elif added:
+            embed = discord.Embed(
+                title="✅ Price Watch Added",
+                description=f"You'll be alerted when **.{name}** {order.value} prices change",
+                color=0x00ff00
+            )
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.followup.send(f"❌ You're already watching .{name} {order.value} prices")
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error adding price watch: {str(e)}")
+
+
+async def remove_price_watch_command(interaction: discord.Interaction, tld: str, order: app_commands.Choice[str]):
+    """Stop watching a TLD's prices for one order type."""
+    await interaction.response.defer(ephemeral=True)
+    from .watch import removePriceWatch as remove_price_watch
+
+    try:
+        name = tld.strip().lower().lstrip('.')
+        if remove_price_watch(tld, order.value, interaction.user.id):
+            embed = discord.Embed(
+                title="✅ Price Watch Removed",
+                description=f"You'll no longer be alerted about **.{name}** {order.value} prices",
+                color=0x00ff00
+            )
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.followup.send(
+                f"❌ You're not watching .{name} {order.value} prices. Use `/price-watch-list` to see your watches"
+            )
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error removing price watch: {str(e)}")
+
+
+async def list_price_watches_command(interaction: discord.Interaction):
+    """List the TLD prices a user watches."""
+    await interaction.response.defer(ephemeral=True)
+    from .watch import listPriceWatches as list_price_watches
+
+    try:
+        watches = list_price_watches(interaction.user.id)
+        if not watches:
+            await interaction.followup.send("📋 You are not watching any prices")
+            return
+
+        embed = discord.Embed(
+            title=f"📋 Your Price Watches ({len(watches)})",
+            description="\n".join(f"• **.{tld}** {order}" for tld, order in watches)[:4096],
+            color=0x0099ff
+        )
+        await interaction.followup.send(embed=embed)
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error getting price watches: {str(e)}")
@@ -1,84 +1,247 @@
-import requests
-from typing import Optional, Dict, Any
+import asyncio
+from discord.ext import tasks
+from typing import Optional, Dict, Any, List, Tuple
+from ..http_client import get_json, UpstreamError
+from .store import get_price_store
+from ..utils import (
+  PRICE_CACHE_TTL, PRICE_CACHE_STALE_TTL, PRICE_CACHE_MAX_ENTRIES,
+  PRICE_SNAPSHOT_MINUTES, PRICE_SNAPSHOT_TLDS, PRICE_SNAPSHOT_CONCURRENCY, PRICE_SNAPSHOT_IDLE_HOURS
+)
+from .cache import StaleWhileRevalidateCache
+from .table import PriceTable, ORDERS
 
+BASE_URL = "https://www.nazhumi.com/api/v1"
 
-def cheapest(tld: str, order: str) -> Optional[Dict[str, Any]]:
-  base = "https://www.nazhumi.com/api/v1"
+# Full price lists per ("tld", tld, order) and ("registrar", registrar, order) key,
+# each in the upstream's ranking for its order. Registrar prices change a few times
+# a day at most, so answers are cached and stale ones are served while they refresh
+# in the background
+price_cache = StaleWhileRevalidateCache(
+  ttl=PRICE_CACHE_TTL,
+  stale_ttl=PRICE_CACHE_STALE_TTL,
+  max_entries=PRICE_CACHE_MAX_ENTRIES
+)
+
+# Columnar index over everything in price_cache. A build costs about 0.25s at
+# 30k rows, so it's only rebuilt by the snapshot loop, off the event loop;
+# keys loaded in between are answered from their own rows
+_price_table = PriceTable(())
+# Cache version the table was built from; entries stored later aren't in it
+_price_table_version = 0
+# key -> (stored version, table of the key's own rows), for keys newer than the table
+_key_tables: Dict[tuple, Tuple[int, PriceTable]] = {}
+
+
+def get_price_table() -> PriceTable:
+  """Get the price table as of the last snapshot."""
+  return _price_table
+
+
+async def rebuild_price_table() -> PriceTable:
+  """Rebuild the price table from the cached price lists in a worker thread."""
+  global _price_table, _price_table_version
+  # Cached lists are never modified, only replaced, so the thread can read them safely
+  version = price_cache.version
+  price_lists = price_cache.items()
+  table = await asyncio.to_thread(PriceTable, price_lists)
+  _price_table, _price_table_version = table, version
+  _key_tables.clear()
+  return table
+
+
+def _table_for(key: tuple, rows: List[Dict[str, Any]]) -> PriceTable:
+  """
+  Get a table holding a key's current rows: the shared one if the key was stored
+  before it was built, otherwise one built from the key's own rows.
+  """
+  stored_version = price_cache.stored_version(key)
+  if stored_version is not None and stored_version <= _price_table_version:
+    return _price_table
+
+  cached = _key_tables.get(key)
+  if cached is None or cached[0] != stored_version:
+    cached = _key_tables[key] = (stored_version, PriceTable([(key, rows)]))
+  return cached[1]
+
+
+def completeTlds(prefix: str, limit: int = 25) -> List[str]:
+  """Get loaded TLDs starting with `prefix`, without touching the network."""
+  return [tld for tld, _ in get_price_table().tld_index.complete(prefix.strip().lower().lstrip('.'), limit)]
+
+
+def completeRegistrars(prefix: str, limit: int = 25) -> List[Tuple[str, str]]:
+  """Get (key, name) for loaded registrars starting with `prefix`, without touching the network."""
+  return get_price_table().registrar_index.complete(prefix.strip(), limit)
+
+
+async def _load_prices(key: tuple) -> Optional[List[Dict[str, Any]]]:
+  """Get a key's full price list, answering from memory once it's loaded."""
+  rows, _ = await price_cache.get(key, lambda: _fetch_prices(*key))
+  return rows
+
+
+async def cheapest(tld: str, order: str, top: int = 5, currency: Optional[str] = None) -> Optional[Dict[str, Any]]:
+  """
+  Get the `top` cheapest registrars for a TLD, optionally in one currency.
+  `age` is how old the loaded prices are, in seconds.
+  """
+  tld = tld.strip().lower().lstrip('.')
+  key = ("tld", tld, order)
+  rows = await _load_prices(key)
+  if not rows:
+    return None
+
+  prices = _table_for(key, rows).cheapest_for_tld(tld, order, top, currency)
+  if not prices:
+    return None
+  return {"domain": tld, "order": order, "prices": prices, "age": price_cache.age(key) or 0.0}
+
+
+async def compareTlds(tlds: List[str], order: str, currency: Optional[str] = None) -> Dict[str, Any]:
+  """
+  Get the cheapest registrar for each of several TLDs, looked up concurrently.
+  `prices` maps each TLD to its cheapest row, or None if it couldn't be found.
+  """
+  results = await asyncio.gather(*(cheapest(tld, order, 1, currency) for tld in tlds))
+  prices = {}
+  ages = []
+  for tld, result in zip(tlds, results):
+    tld = tld.strip().lower().lstrip('.')
+    prices[tld] = result["prices"][0] if result else None
+    if result:
+      ages.append(result["age"])
+  return {"order": order, "prices": prices, "age": max(ages, default=0.0)}
+
+
+async def registrarSearch(registrar: str, order: str, top: int = 5, currency: Optional[str] = None) -> Optional[Dict[str, Any]]:
+  """
+  Get a registrar's `top` cheapest TLDs, optionally in one currency.
+  `age` is how old the loaded prices are, in seconds.
+  """
+  registrar = registrar.strip().lower()
+  key = ("registrar", registrar, order)
+  rows = await _load_prices(key)
+  if not rows:
+    return None
+
+  prices = _table_for(key, rows).cheapest_for_registrar(registrar, order, top, currency)
+  if not prices:
+    return None
+  return {
+    "reg": prices[0]["registrar"],
+    "reg_web": prices[0]["registrar_web"],
+    "order": order,
+    "prices": prices,
+    "age": price_cache.age(key) or 0.0
+  }
+
+
+async def refresh_price_snapshot() -> int:
+  """
+  Bulk-load the configured TLDs in every order and the watched (tld, order) pairs,
+  and reload every key looked up in the last PRICE_SNAPSHOT_IDLE_HOURS, then rebuild
+  the table; returns how many loaded. Keys nobody asked for since are dropped
+  instead of being reloaded forever.
+  """
+  keys = {("tld", tld, order) for tld in PRICE_SNAPSHOT_TLDS for order in ORDERS}
+  keys.update(("tld", tld, order) for tld, order in get_price_store().get_watched_pairs())
+  dropped = price_cache.evict_idle(PRICE_SNAPSHOT_IDLE_HOURS * 3600, keep=keys)
+  keys.update(price_cache.keys())
+  semaphore = asyncio.Semaphore(PRICE_SNAPSHOT_CONCURRENCY)
+
+  async def refresh(key: tuple) -> bool:
+    async with semaphore:
+      return await price_cache.refresh(key, lambda: _fetch_prices(*key)) is not None
+
+  results = await asyncio.gather(*(refresh(key) for key in keys))
+  loaded = sum(results)
+  table = await rebuild_price_table()
+  print(
+    f"Price snapshot: loaded {loaded}/{len(keys)} price lists, dropped {dropped} idle ones, "
+    f"{len(table)} rows in the table"
+  )
+  return loaded
+
+
+@tasks.loop(minutes=PRICE_SNAPSHOT_MINUTES)
+async def price_snapshot_loop():
+  """Keep the price table loaded so commands never wait on the upstream, then alert price watchers."""
+  try:
+    await refresh_price_snapshot()
+  except Exception as e:
+    print(f"Error refreshing price snapshot: {e}")
+    return
+
+  try:
+    # Diffed right after the snapshot that brought the changes in
+    from .watch import check_price_watches
+    await check_price_watches()
+  except Exception as e:
+    print(f"Error checking price watches: {e}")
+
+
+async def _fetch_prices(kind: str, name: str, order: str) -> Optional[List[Dict[str, Any]]]:
+  """Fetch the full price list for a TLD or a registrar as table rows, ranked by `order` upstream."""
+  if kind == "tld":
+    return await _fetch_tld_prices(name, order)
+  return await _fetch_registrar_prices(name, order)
+
+
+async def _fetch_tld_prices(tld: str, order: str) -> Optional[List[Dict[str, Any]]]:
   params = {"domain": tld, "order": order}
 
   try:
-    response = requests.get(base, params=params)
-    response.raise_for_status()
-    data = response.json()
-    
+    data = await get_json(BASE_URL, params=params)
+
     if data.get("code") == 100 and "data" in data and "price" in data["data"]:
-      prices = data["data"]["price"]
-      if len(prices) >= 5:
-        result = {
-          "domain": data["data"]["domain"],
-          "order": data["data"]["order"]
+      return [
+        {
+          "tld": data["data"]["domain"],
+          "registrar": price_data["registrar"],
+          "registrar_web": price_data["registrarweb"],
+          "currency": price_data["currency"],
+          "new": price_data["new"],
+          "renew": price_data["renew"],
+          "transfer": price_data["transfer"]
         }
-        
-        # Add pricing data for top 5 registrars
-        for i in range(5):
-          num = ["1st", "2nd", "3rd", "4th", "5th"][i]
-          price_data = prices[i]
-          result.update({
-            f"reg_{num}": price_data["registrar"],
-            f"new_{num}": price_data["new"],
-            f"renew_{num}": price_data["renew"],
-            f"transfer_{num}": price_data["transfer"],
-            f"currency_{num}": price_data["currency"],
-            f"reg_web_{num}": price_data["registrarweb"]
-          })
-        return result
-      else:
-        return None
-    else:
-      return None
-  except requests.exceptions.RequestException as e:
+        for price_data in data["data"]["price"]
+      ] or None
+
+    return None
+
+  except UpstreamError as e:
     print(f"Error in cheapest API request: {e}")
     return None
-  except (KeyError, IndexError) as e:
+  except (KeyError, IndexError, TypeError) as e:
     print(f"Error parsing cheapest API response: {e}")
-    
-def registrarSearch(registrar: str, order: str) -> Optional[Dict[str, Any]]:
-  base = "https://www.nazhumi.com/api/v1"
+    return None
+
+
+async def _fetch_registrar_prices(registrar: str, order: str) -> Optional[List[Dict[str, Any]]]:
   params = {"registrar": registrar, "order": order}
 
   try:
-    response = requests.get(base, params=params)
-    response.raise_for_status()
-    data = response.json()
-    
+    data = await get_json(BASE_URL, params=params)
+
     if data.get("code") == 100 and "data" in data and "price" in data["data"]:
-      prices = data["data"]["price"]
-      if len(prices) >= 5:
-        result = {
-          "reg": data["data"]["registrar"],
-          "order": data["data"]["order"],
-          "reg_web": data["data"]["registrarweb"]
+      return [
+        {
+          "tld": price_data["domain"],
+          "registrar": data["data"]["registrar"],
+          "registrar_web": data["data"]["registrarweb"],
+          "currency": price_data["currency"],
+          "new": price_data["new"],
+          "renew": price_data["renew"],
+          "transfer": price_data["transfer"]
         }
-        
-        # Add domain pricing data for top 5 results
-        for i in range(5):
-          num = ["1st", "2nd", "3rd", "4th", "5th"][i]
-          price_data = prices[i]
-          result.update({
-            f"domain_{num}": price_data["domain"],
-            f"new_{num}": price_data["new"],
-            f"renew_{num}": price_data["renew"],
-            f"transfer_{num}": price_data["transfer"],
-            f"currency_{num}": price_data["currency"]
-          })
-        
-        return result
-    
+        for price_data in data["data"]["price"]
+      ] or None
+
     return None
-    
-  except requests.exceptions.RequestException as e:
+
+  except UpstreamError as e:
     print(f"Error in registrar search API request: {e}")
     return None
-  except (KeyError, IndexError) as e:
+  except (KeyError, IndexError, TypeError) as e:
     print(f"Error parsing registrar search API response: {e}")
-    return None
\ No newline at end of file
+    return None
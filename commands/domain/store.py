@@ -0,0 +1,170 @@
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Iterable
+
+from ..utils import MONITOR_DB
+
+# Seconds to wait for another instance's write lock before giving up. Store
+# calls run on the event loop, so this bounds how long one can stall it
+SQLITE_BUSY_TIMEOUT = 5
+
+# Created if missing; databases from before this store was split out already have them
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS price_watches (
+        user_id TEXT NOT NULL,
+        tld TEXT NOT NULL,
+        order_type TEXT NOT NULL,
+        added_epoch INTEGER,
+        PRIMARY KEY (user_id, tld, order_type)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_price_watches_pair ON price_watches(tld, order_type)",
+    # Last seen prices per watched (tld, order), so every instance diffs against the same snapshot
+    """
+    CREATE TABLE IF NOT EXISTS price_groups (
+        tld TEXT NOT NULL,
+        order_type TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        prices TEXT NOT NULL,
+        PRIMARY KEY (tld, order_type)
+    )
+    """,
+)
+
+
+class PriceWatchStore:
+    """SQLite-backed storage for price watches and the last seen prices of watched pairs."""
+
+    def __init__(self, path: str = MONITOR_DB):
+        self.path = path
+        # Shares the monitor database file, and like the monitor store opens
+        # its transactions explicitly with _transaction()
+        self.conn = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self._transaction():
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+
+    @contextmanager
+    def _transaction(self):
+        """Run a block in one write transaction, taking the write lock up front."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+    def _drop_unwatched_group(self, tld: str, order: str):
+        """Drop a pair's last seen prices once nobody watches it, so watching it again starts afresh."""
+        self.conn.execute(
+            "DELETE FROM price_groups WHERE tld = ? AND order_type = ? "
+            "AND NOT EXISTS (SELECT 1 FROM price_watches WHERE tld = ? AND order_type = ?)",
+            (tld, order, tld, order)
+        )
+
+    def add_price_watch(self, user_id: str, tld: str, order: str) -> bool:
+        """Subscribe a user to price changes of a (tld, order) pair, returning False if already subscribed."""
+        with self._transaction():
+            # A pair nobody watched has no current baseline; the next diff records a fresh one
+            self._drop_unwatched_group(tld, order)
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO price_watches (user_id, tld, order_type, added_epoch) VALUES (?, ?, ?, ?)",
+                (user_id, tld, order, int(time.time()))
+            )
+            return cursor.rowcount > 0
+
+    def remove_price_watch(self, user_id: str, tld: str, order: str) -> bool:
+        """Unsubscribe a user from a (tld, order) pair, dropping its baseline once unwatched."""
+        with self._transaction():
+            cursor = self.conn.execute(
+                "DELETE FROM price_watches WHERE user_id = ? AND tld = ? AND order_type = ?",
+                (user_id, tld, order)
+            )
+            if cursor.rowcount == 0:
+                return False
+            self._drop_unwatched_group(tld, order)
+            return True
+
+    def list_price_watches(self, user_id: str) -> List[tuple]:
+        """Get the (tld, order) pairs a user watches."""
+        rows = self.conn.execute(
+            "SELECT tld, order_type FROM price_watches WHERE user_id = ? ORDER BY added_epoch",
+            (user_id,)
+        )
+        return [(row["tld"], row["order_type"]) for row in rows]
+
+    def get_watched_pairs(self) -> set:
+        """Get every (tld, order) pair at least one user watches."""
+        rows = self.conn.execute("SELECT DISTINCT tld, order_type FROM price_watches")
+        return {(row["tld"], row["order_type"]) for row in rows}
+
+    def get_watched_digests(self) -> Dict[tuple, Optional[str]]:
+        """Get the last seen digest of every watched (tld, order) pair, None for pairs without a baseline."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT w.tld, w.order_type, g.digest FROM price_watches w "
+            "LEFT JOIN price_groups g ON g.tld = w.tld AND g.order_type = w.order_type"
+        )
+        return {(row["tld"], row["order_type"]): row["digest"] for row in rows}
+
+    def get_price_watchers(self, pairs: Iterable[tuple]) -> Dict[tuple, List[str]]:
+        """Get the user IDs watching each of the given (tld, order) pairs."""
+        watchers = {}
+        for tld, order in pairs:
+            rows = self.conn.execute(
+                "SELECT user_id FROM price_watches WHERE tld = ? AND order_type = ?",
+                (tld, order)
+            )
+            watchers[(tld, order)] = [row["user_id"] for row in rows]
+        return watchers
+
+    def get_price_group(self, tld: str, order: str) -> Optional[tuple]:
+        """Get the last seen (digest, prices) of a (tld, order) pair."""
+        row = self.conn.execute(
+            "SELECT digest, prices FROM price_groups WHERE tld = ? AND order_type = ?",
+            (tld, order)
+        ).fetchone()
+        return (row["digest"], json.loads(row["prices"])) if row else None
+
+    def swap_price_group(self, tld: str, order: str, previous_digest: Optional[str],
+                         digest: str, prices: dict) -> bool:
+        """
+        Replace a pair's last seen prices, but only if they still have `previous_digest`
+        (None for a pair seen for the first time). Returns False if another instance
+        recorded the change first, so each change is reported once.
+        """
+        with self._transaction():
+            if previous_digest is None:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO price_groups (tld, order_type, digest, prices) VALUES (?, ?, ?, ?)",
+                    (tld, order, digest, json.dumps(prices, ensure_ascii=False))
+                )
+            else:
+                cursor = self.conn.execute(
+                    "UPDATE price_groups SET digest = ?, prices = ? "
+                    "WHERE tld = ? AND order_type = ? AND digest = ?",
+                    (digest, json.dumps(prices, ensure_ascii=False), tld, order, previous_digest)
+                )
+            return cursor.rowcount > 0
+
+    def close(self):
+        self.conn.close()
+
+
+_store: Optional[PriceWatchStore] = None
+
+
+def get_price_store() -> PriceWatchStore:
+    """Get the shared price watch store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = PriceWatchStore()
+    return _store
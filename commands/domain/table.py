@@ -0,0 +1,131 @@
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Optional, Dict, Any, Iterable, List, Set, Tuple
+
+# Price columns, each of which the upstream can rank a price list by
+ORDERS = ("new", "renew", "transfer")
+
+
+def _intern(value: Any) -> str:
+    return sys.intern(str(value)) if value is not None else ""
+
+
+class PrefixIndex:
+    """
+    Sorted names for prefix lookups: a bisect finds the first match and
+    the rest follow it, so a lookup never scans the whole list.
+    """
+
+    def __init__(self, names: Dict[str, str]):
+        # Lowercased key -> name to show, sorted by key
+        self.keys = sorted(names)
+        self.names = [names[key] for key in self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def complete(self, prefix: str, limit: int = 25) -> List[Tuple[str, str]]:
+        """Get up to `limit` (key, name) pairs whose key starts with `prefix`."""
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        results = []
+        for index in range(start, min(start + limit, len(self.keys))):
+            if not self.keys[index].startswith(prefix):
+                break
+            results.append((self.keys[index], self.names[index]))
+        return results
+
+
+class PriceTable:
+    """
+    Registrar prices held column by column, indexed by TLD and by registrar.
+    Each index entry keeps one array of row numbers per loaded order, in the
+    upstream's ranking for that order, so a top-N query is a slice rather
+    than a sort. The upstream ranks across currencies, which raw numbers can't.
+    The table is immutable; a new one is built when the data changes.
+    """
+
+    def __init__(self, price_lists: Iterable[Tuple[tuple, List[Dict[str, Any]]]]):
+        self.tlds: List[str] = []
+        self.registrars: List[str] = []
+        self.registrar_webs: List[str] = []
+        self.currencies: List[str] = []
+        # Values as the upstream sent them
+        self.display = {order: [] for order in ORDERS}
+        # key -> order -> rows in the upstream's ranking
+        self.by_tld: Dict[str, Dict[str, array]] = {}
+        self.by_registrar: Dict[str, Dict[str, array]] = {}
+
+        # (tld, registrar) -> row; a pair can arrive in several lists
+        pairs: Dict[Tuple[str, str], int] = {}
+        tld_names: Set[str] = set()
+        registrar_names: Dict[str, str] = {}
+        for (kind, name, order), rows in price_lists:
+            ranked, listed = array('I'), set()
+            for row in rows:
+                tld = row['tld'].lower().lstrip('.')
+                registrar = row['registrar']
+                index = pairs.get((tld, registrar.lower()))
+                if index is None:
+                    index = pairs[(tld, registrar.lower())] = len(self.tlds)
+                    self.tlds.append(_intern(tld))
+                    self.registrars.append(_intern(registrar))
+                    self.registrar_webs.append(_intern(row.get('registrar_web')))
+                    self.currencies.append(_intern(row.get('currency')))
+                    for column in ORDERS:
+                        self.display[column].append(row.get(column))
+                if index not in listed:
+                    listed.add(index)
+                    ranked.append(index)
+                tld_names.add(tld)
+                registrar_names.setdefault(registrar.lower(), registrar)
+            index_by = self.by_tld if kind == "tld" else self.by_registrar
+            index_by.setdefault(name, {})[order] = ranked
+            # Registrar lists are also completed by the name they were requested by
+            if kind == "registrar" and ranked:
+                registrar_names.setdefault(name, self.registrars[ranked[0]])
+
+        # Autocomplete for every TLD and registrar the table has seen
+        self.tld_index = PrefixIndex({tld: tld for tld in tld_names})
+        self.registrar_index = PrefixIndex(registrar_names)
+
+    def __len__(self):
+        return len(self.tlds)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Get one row as a dict."""
+        result = {
+            "tld": self.tlds[index],
+            "registrar": self.registrars[index],
+            "registrar_web": self.registrar_webs[index],
+            "currency": self.currencies[index],
+        }
+        for order in ORDERS:
+            result[order] = self.display[order][index]
+        return result
+
+    def _query(self, index: Dict[str, Dict[str, array]], key: str, order: str,
+               top: int, currency: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        rows = index.get(key.lower(), {}).get(order)
+        if rows is None:
+            return None
+
+        results = []
+        for row_index in rows:
+            if currency and self.currencies[row_index].upper() != currency.upper():
+                continue
+            results.append(self.row(row_index))
+            if len(results) >= top:
+                break
+        return results
+
+    def cheapest_for_tld(self, tld: str, order: str, top: int = 5,
+                         currency: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Get the `top` cheapest registrars for a TLD, or None if its list for `order` isn't loaded."""
+        return self._query(self.by_tld, tld.lstrip('.'), order, top, currency)
+
+    def cheapest_for_registrar(self, registrar: str, order: str, top: int = 5,
+                               currency: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Get a registrar's `top` cheapest TLDs, or None if its list for `order` isn't loaded."""
+        return self._query(self.by_registrar, registrar, order, top, currency)
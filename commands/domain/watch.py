@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import discord
+
+from ..whois.monitor import add_fields_within_limits, get_domain_monitor
+from .script import price_cache, cheapest
+from .store import get_price_store
+
+logger = logging.getLogger(__name__)
+
+# Most changed registrars listed in one pair's alert
+MAX_LISTED_CHANGES = 10
+
+
+def group_prices(rows: List[Dict[str, Any]], order: str) -> Dict[str, list]:
+    """Get one order's prices from a TLD's price list as registrar -> [price, currency]."""
+    return {row["registrar"]: [row.get(order), row.get("currency")] for row in rows}
+
+
+def group_digest(prices: Dict[str, list]) -> str:
+    """Hash a price group, so an unchanged group is recognised without comparing rows."""
+    return hashlib.blake2b(json.dumps(prices, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+def _format_price(price: list) -> str:
+    return f"{price[0]} {price[1]}"
+
+
+def describe_price_changes(previous: Dict[str, list], prices: Dict[str, list]) -> List[str]:
+    """List human-readable changes between two snapshots of a price group, in the upstream's ranking."""
+    changes = []
+    # Listed registrars in their current rank, then the ones that dropped out
+    for registrar in [*prices, *(name for name in previous if name not in prices)]:
+        old, new = previous.get(registrar), prices.get(registrar)
+        if old is None:
+            changes.append(f"{registrar}: now listed at {_format_price(new)}")
+        elif new is None:
+            changes.append(f"{registrar}: no longer listed (was {_format_price(old)})")
+        elif old != new:
+            changes.append(f"{registrar}: {_format_price(old)} → {_format_price(new)}")
+
+    if len(changes) > MAX_LISTED_CHANGES:
+        changes = changes[:MAX_LISTED_CHANGES] + [f"…and {len(changes) - MAX_LISTED_CHANGES} more"]
+    return changes
+
+
+class PriceWatcher:
+    """
+    Diffs watched (tld, order) price groups between snapshots.
+    Every watched pair's hash is compared with the digest last recorded in the
+    store, which one query reads for all pairs; only groups whose hash moved
+    are loaded, and only their watchers are looked up, so a cycle costs what
+    changed rather than watchers × TLDs.
+    """
+
+    def __init__(self):
+        # (tld, order) -> (price list, digest of its group), so an unreplaced list isn't hashed again.
+        # Only a memo of the list; the store decides whether the group changed
+        self.digests: Dict[Tuple[str, str], Tuple[list, str]] = {}
+
+    def diff(self) -> Dict[Tuple[str, str], List[str]]:
+        """Get the changes of every watched pair whose prices moved since its recorded baseline."""
+        store = get_price_store()
+        stored_digests = store.get_watched_digests()
+        for pair in self.digests.keys() - stored_digests.keys():
+            del self.digests[pair]
+
+        changes = {}
+        for pair, stored_digest in stored_digests.items():
+            tld, order = pair
+            rows = price_cache.peek(("tld", tld, order))
+            if rows is None:
+                continue
+
+            memo = self.digests.get(pair)
+            # The cache stores a new list on every refresh, so the same list means the same digest
+            if memo is None or memo[0] is not rows:
+                memo = self.digests[pair] = (rows, group_digest(group_prices(rows, order)))
+            digest = memo[1]
+            if digest == stored_digest:
+                continue
+
+            previous = store.get_price_group(tld, order)
+            previous_digest = previous[0] if previous else None
+            prices = group_prices(rows, order)
+            if digest != previous_digest and store.swap_price_group(tld, order, previous_digest, digest, prices):
+                # A pair without a baseline only records one
+                if previous is not None:
+                    changes[pair] = describe_price_changes(previous[1], prices)
+        return changes
+
+    def collect_alerts(self) -> Dict[str, List[Tuple[str, str, List[str]]]]:
+        """Get the changed pairs as (tld, order, changes) grouped by watching user."""
+        changes = self.diff()
+        if not changes:
+            return {}
+
+        alerts = {}
+        for pair, user_ids in get_price_store().get_price_watchers(changes).items():
+            for user_id in user_ids:
+                alerts.setdefault(user_id, []).append((*pair, changes[pair]))
+        return alerts
+
+
+price_watcher = PriceWatcher()
+
+
+def build_price_embed(changes: list, description: str) -> discord.Embed:
+    """Build the price change alert embed for one user's (tld, order, changes) entries."""
+    embed = discord.Embed(
+        title="💲 Domain Price Alert",
+        description=description,
+        color=0x1e90ff
+    )
+    embed.set_footer(text=f"Check time: {datetime.now().strftime('%Y-%m-%d')}")
+    add_fields_within_limits(
+        embed,
+        [
+            (f".{tld} ({order})", "\n".join(f"• {line}" for line in lines)[:1024], False)
+            for tld, order, lines in changes
+        ],
+        lambda remaining: (f"…and {remaining} more watched prices changed", "Use `/price-watch-list` to see them")
+    )
+    return embed
+
+
+async def send_price_alert(user: discord.User, changes: list, is_startup=False, channel_fallback: list = None):
+    """
+    Tell a user that prices of the (tld, order) pairs they watch changed, as a
+    sender for the domain monitor's dispatch_notifications.
+    Each change is claimed once in the store, so it's only reported by one snapshot.
+    """
+    try:
+        embed = build_price_embed(changes, "Registrar prices you watch changed:")
+        try:
+            await user.send(embed=embed)
+            logger.info(f"Sent price alert to {user.name}")
+        except discord.Forbidden:
+            logger.warning(f"Cannot send DM to {user.name}, user has DMs disabled")
+            channel_fallback.append((user, build_price_embed(
+                changes, f"{user.mention} Registrar prices you watch changed:"
+            ), ()))
+
+    except Exception as e:
+        logger.error(f"Error sending price alert to {user.name}: {e}")
+
+
+async def check_price_watches():
+    """Diff the watched pairs against the snapshot just loaded and alert their watchers."""
+    # The domain monitor delivers the alerts, with its DM and channel fallback handling
+    monitor = get_domain_monitor()
+    if monitor is None:
+        # Nothing could deliver the alerts; leave the changes for a later snapshot
+        return
+
+    alerts = price_watcher.collect_alerts()
+    if alerts:
+        print(f"Price changes for {len(alerts)} watching users")
+        # The first snapshot starts during setup, before the gateway is ready
+        await monitor.bot.wait_until_ready()
+        await monitor.dispatch_notifications(alerts, send=send_price_alert)
+
+
+async def addPriceWatch(tld: str, order: str, user_id: int) -> Optional[bool]:
+    """
+    Watch a (tld, order) pair for a user, returning None if the TLD has no prices.
+    Loading its prices here gives the next diff a baseline to compare against.
+    """
+    tld = tld.strip().lower().lstrip('.')
+    if await cheapest(tld, order, 1) is None:
+        return None
+    return get_price_store().add_price_watch(str(user_id), tld, order)
+
+
+def removePriceWatch(tld: str, order: str, user_id: int) -> bool:
+    """Stop watching a (tld, order) pair for a user."""
+    return get_price_store().remove_price_watch(str(user_id), tld.strip().lower().lstrip('.'), order)
+
+
+def listPriceWatches(user_id: int) -> List[Tuple[str, str]]:
+    """Get the (tld, order) pairs a user watches."""
+    return get_price_store().list_price_watches(str(user_id))
+
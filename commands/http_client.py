@@ -0,0 +1,120 @@
+import asyncio
+import aiohttp
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+from .resilience import get_breaker, retry_delay
+from .utils import HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST, HTTP_DNS_CACHE_TTL, UPSTREAM_RETRIES
+
+# Default total timeout per upstream host, in seconds; other hosts use HTTP_TIMEOUT
+UPSTREAM_TIMEOUTS = {
+    "api.mcsrvstat.us": 15,  # Pings the Minecraft server before answering
+    "ip-api.com": 5,
+    "api.iplocation.net": 5,
+    "zipcloud.ibsnet.co.jp": 5,
+}
+
+# Shared by every upstream lookup, created on first use inside the event loop
+_session: Optional[aiohttp.ClientSession] = None
+
+
+class UpstreamError(Exception):
+    """Raised when an upstream request fails, times out or returns an error status."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Raised without sending a request while the upstream's circuit breaker is open."""
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        # One keep-alive pool for all upstreams, so repeated lookups to the same
+        # few hosts reuse connections instead of paying a new TCP+TLS handshake
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(connector=connector, raise_for_status=True)
+    return _session
+
+
+def upstream_timeout(url: str, timeout: Optional[float] = None) -> aiohttp.ClientTimeout:
+    """Get the timeout for a request, defaulting to the upstream's own default."""
+    if timeout is None:
+        timeout = UPSTREAM_TIMEOUTS.get(urlsplit(url).hostname, HTTP_TIMEOUT)
+    return aiohttp.ClientTimeout(total=timeout)
+
+
+async def request_json(method: str, url: str, *, params: Optional[Dict[str, Any]] = None,
+                       json: Any = None, headers: Optional[Dict[str, str]] = None,
+                       timeout: Optional[float] = None, retries: Optional[int] = None) -> Any:
+    """
+    Send a request with the shared session and decode the JSON response.
+    Goes through the host's circuit breaker, failing fast while it's open.
+    Timeouts, connection errors, 429s and 5xx responses are retried with
+    backoff; only GETs are retried unless `retries` is given.
+    """
+    host = urlsplit(url).hostname
+    breaker = get_breaker(host)
+    if retries is None:
+        retries = UPSTREAM_RETRIES if method == "GET" else 0
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise UpstreamUnavailable(
+                f"{host} is unavailable, retrying in {breaker.retry_after():.0f}s"
+            )
+
+        try:
+            async with get_session().request(
+                method, url, params=params, json=json, headers=headers, timeout=upstream_timeout(url, timeout)
+            ) as response:
+                # Some upstreams don't send an application/json content type
+                result = await response.json(content_type=None)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 429 and e.status < 500:
+                # The upstream is up and rejected the request itself
+                breaker.record_success()
+                raise UpstreamError(f"{method} {url} failed: {e.status} {e.message}") from e
+            breaker.record_failure()
+            error = UpstreamError(f"{method} {url} failed: {e.status} {e.message}")
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            error = UpstreamError(f"{method} {url} timed out")
+        except aiohttp.ClientError as e:
+            breaker.record_failure()
+            error = UpstreamError(f"{method} {url} failed: {e}")
+        except ValueError as e:
+            # A malformed body won't get better on retry
+            breaker.record_failure()
+            raise UpstreamError(f"{method} {url} returned invalid JSON: {e}") from e
+        else:
+            breaker.record_success()
+            return result
+        finally:
+            breaker.release()
+
+        if attempt < retries:
+            await asyncio.sleep(retry_delay(attempt))
+
+    raise error
+
+
+async def get_json(url: str, **kwargs) -> Any:
+    """GET a JSON resource with the shared session."""
+    return await request_json("GET", url, **kwargs)
+
+
+async def post_json(url: str, **kwargs) -> Any:
+    """POST to a JSON API with the shared session."""
+    return await request_json("POST", url, **kwargs)
+
+
+async def close_session():
+    """Close the shared session and its connection pool."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
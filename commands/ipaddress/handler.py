@@ -7,7 +7,7 @@ async def ipdetail_command(interaction: discord.Interaction, ipaddress: str):
     """Get detailed information about an IP address."""
     await interaction.response.defer(ephemeral=True)
     
-    result = ipdetails(ipaddress)
+    result = await ipdetails(ipaddress)
     if result is None:
         await interaction.followup.send("Invalid IP address or internal error")
         return
@@ -39,7 +39,7 @@ async def iplocation_command(interaction: discord.Interaction, ipaddress: str):
     """Get geolocation information for an IP address."""
     await interaction.response.defer(ephemeral=True)
     
-    result = iplocations(ipaddress)
+    result = await iplocations(ipaddress)
     if result is None:
         await interaction.followup.send("Invalid IP address or internal error")
         return
@@ -1,15 +1,13 @@
-import requests
 from typing import Optional, Dict
+from ..http_client import get_json, UpstreamError
 
 
-def ipdetails(ipaddress: str) -> Optional[Dict[str, str]]:
+async def ipdetails(ipaddress: str) -> Optional[Dict[str, str]]:
   base = "https://api.iplocation.net/"
   params = {"ip": ipaddress}
   
   try:
-    response = requests.get(base, params=params)
-    response.raise_for_status()
-    data = response.json()
+    data = await get_json(base, params=params)
     
     if data.get("response_code") == '200':
       result = {
@@ -26,20 +24,18 @@ def ipdetails(ipaddress: str) -> Optional[Dict[str, str]]:
     
     return None
     
-  except requests.exceptions.RequestException as e:
+  except UpstreamError as e:
     print(f"Error in IP details API request: {e}")
     return None
   except KeyError as e:
     print(f"Error parsing IP details API response: {e}")
     return None
   
-def iplocations(ipaddress: str) -> Optional[Dict[str, str]]:
+async def iplocations(ipaddress: str) -> Optional[Dict[str, str]]:
   base = f"http://ip-api.com/json/{ipaddress}"
   
   try:
-    response = requests.get(base)
-    response.raise_for_status()
-    data = response.json()
+    data = await get_json(base)
     
     if data.get("status") == "success":
       result = {
@@ -56,7 +52,7 @@ def iplocations(ipaddress: str) -> Optional[Dict[str, str]]:
     
     return None
     
-  except requests.exceptions.RequestException as e:
+  except UpstreamError as e:
     print(f"Error in IP location API request: {e}")
     return None
   except KeyError as e:
@@ -7,7 +7,7 @@ async def mcserver_command(interaction: discord.Interaction, server_type: app_co
     """Get information about a Minecraft server."""
     await interaction.response.defer(ephemeral=True)
     
-    result = minecraftServer(server_type.value, ipaddress)
+    result = await minecraftServer(server_type.value, ipaddress)
     if result is None:
         await interaction.followup.send("Invalid input or server type")
         return
@@ -1,8 +1,8 @@
-import requests
 from typing import Optional, Dict, Any
+from ..http_client import get_json, UpstreamError
 
 
-def minecraftServer(server_type: Any, server_ip: str) -> Optional[Dict[str, Any]]:
+async def minecraftServer(server_type: Any, server_ip: str) -> Optional[Dict[str, Any]]:
   server_type_value = server_type.value if hasattr(server_type, 'value') else str(server_type)
   
   if server_type_value == 'java':
@@ -13,9 +13,7 @@ def minecraftServer(server_type: Any, server_ip: str) -> Optional[Dict[str, Any]
     return None
   
   try:
-    response = requests.get(base)
-    response.raise_for_status()
-    data = response.json()
+    data = await get_json(base)
     
     if data.get("online"):
       result = {
@@ -33,7 +31,7 @@ def minecraftServer(server_type: Any, server_ip: str) -> Optional[Dict[str, Any]
     
     return None
     
-  except requests.exceptions.RequestException as e:
+  except UpstreamError as e:
     print(f"Error in Minecraft server API request: {e}")
     return None
   except KeyError as e:
@@ -0,0 +1,123 @@
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, Any
+
+from .utils import UPSTREAM_BREAKER_THRESHOLD, UPSTREAM_BREAKER_RESET
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Number of recent calls the reported failure rate is measured over
+FAILURE_RATE_WINDOW = 20
+
+# Retry backoff: full jitter over an exponentially growing cap, in seconds
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+
+
+class CircuitBreaker:
+    """
+    Fails calls to an unhealthy upstream fast instead of waiting on it.
+    Opens after `failure_threshold` consecutive failures; after `reset_timeout`
+    seconds one trial call is let through, which closes it again on success.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = UPSTREAM_BREAKER_THRESHOLD,
+                 reset_timeout: float = UPSTREAM_BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.outcomes = deque(maxlen=FAILURE_RATE_WINDOW)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Check whether a call may go through, counting it if not."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"Circuit for {self.name} half-open, trying one call")
+
+        if self.state == HALF_OPEN:
+            if self.trial_in_flight:
+                self.rejected += 1
+                return False
+            self.trial_in_flight = True
+
+        self.calls += 1
+        return True
+
+    def record_success(self):
+        """Record a call the upstream answered."""
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+        if self.state != CLOSED:
+            self.state = CLOSED
+            logger.info(f"Circuit for {self.name} closed, upstream recovered")
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit if the upstream looks down."""
+        self.outcomes.append(False)
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Let another trial through if a half-open trial ended without an outcome (e.g. cancelled)."""
+        self.trial_in_flight = False
+
+    def retry_after(self) -> float:
+        """Get the seconds until an open circuit lets a trial call through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the breaker's state and counters for reporting."""
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0,
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after(),
+        }
+
+
+# One breaker per upstream host, created on first use
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Get the circuit breaker for an upstream host."""
+    breaker = breakers.get(host)
+    if breaker is None:
+        breaker = breakers[host] = CircuitBreaker(host)
+    return breaker
+
+
+def retry_delay(attempt: int) -> float:
+    """Get the backoff before retry number `attempt` (starting at 0), with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
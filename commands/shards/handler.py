@@ -0,0 +1,57 @@
+import math
+
+import discord
+from .script import shard_stats
+
+
+def format_uptime(seconds: float) -> str:
+    """Format an uptime in seconds as e.g. '2d 3h 4m'."""
+    minutes = int(seconds // 60)
+    days, minutes = divmod(minutes, 1440)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}d {hours}h {minutes}m"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+async def shards_command(interaction: discord.Interaction, bot):
+    """Show gateway latency, event rate and guild count for each shard."""
+    report = shard_stats.report(bot)
+
+    embed = discord.Embed(
+        title="🧩 Shard Status",
+        description=f"{len(report)} shard(s) in this process, {len(bot.guilds)} guilds",
+        color=0x00ff00
+    )
+
+    # Highlight the shard with the highest event rate
+    hottest = max(report, key=lambda entry: entry['events_per_minute'], default=None)
+
+    for entry in report[:25]:
+        if entry['closed']:
+            status_emoji = "🔴"
+        elif not math.isnan(entry['latency']) and entry['latency'] > 0.5:
+            status_emoji = "🟡"
+        else:
+            status_emoji = "🟢"
+
+        latency = entry['latency']
+        # Latency is NaN until the shard's first heartbeat is acknowledged
+        shard_info = f"**Latency:** {'-' if math.isnan(latency) else f'{latency * 1000:.0f}ms'}\n"
+        shard_info += f"**Guilds:** {entry['guilds']}\n"
+        shard_info += f"**Events:** {entry['events_per_minute']:.1f}/min ({entry['events']} total)\n"
+        shard_info += f"**Reconnects:** {entry['disconnects']} (resumed {entry['resumes']})"
+        if entry['uptime'] is not None:
+            shard_info += f"\n**Connected for:** {format_uptime(entry['uptime'])}"
+
+        name = f"{status_emoji} Shard {entry['shard_id']}"
+        if hottest is not None and entry is hottest and entry['events_per_minute'] > 0 and len(report) > 1:
+            name += " 🔥"
+        embed.add_field(name=name, value=shard_info, inline=True)
+
+    if len(report) > 25:
+        embed.set_footer(text=f"Showing 25 of {len(report)} shards")
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
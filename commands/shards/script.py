@@ -0,0 +1,145 @@
+import time
+from collections import Counter, deque
+from typing import Optional, Dict, Any, List
+
+import discord
+
+# Window over which per-shard event rates are measured, in seconds
+EVENT_RATE_WINDOW = 300
+
+
+class ShardStats:
+    """
+    Per-shard gateway instrumentation: event rates, connection events and uptime.
+    Latency and guild counts are read from the bot when a report is built.
+    """
+
+    def __init__(self):
+        # shard_id -> deque of [minute, events] buckets inside EVENT_RATE_WINDOW
+        self.buckets: Dict[int, deque] = {}
+        self.totals = Counter()
+        self.connects = Counter()
+        self.disconnects = Counter()
+        self.resumes = Counter()
+        self.connected_since: Dict[int, float] = {}
+
+    def attach(self, bot: discord.Client):
+        """Register the listeners that feed the counters."""
+        bot.add_listener(self.on_message, 'on_message')
+        bot.add_listener(self.on_interaction, 'on_interaction')
+        if isinstance(bot, discord.AutoShardedClient):
+            bot.add_listener(self.on_shard_connect, 'on_shard_connect')
+            bot.add_listener(self.on_shard_disconnect, 'on_shard_disconnect')
+            bot.add_listener(self.on_shard_resumed, 'on_shard_resumed')
+        else:
+            # An unsharded bot only fires the plain events; it is reported as shard 0
+            bot.add_listener(self.on_connect, 'on_connect')
+            bot.add_listener(self.on_disconnect, 'on_disconnect')
+            bot.add_listener(self.on_resumed, 'on_resumed')
+
+    def record_event(self, shard_id: int):
+        """Count one gateway event for a shard."""
+        minute = int(time.monotonic() // 60)
+        buckets = self.buckets.setdefault(shard_id, deque(maxlen=EVENT_RATE_WINDOW // 60 + 1))
+        if buckets and buckets[-1][0] == minute:
+            buckets[-1][1] += 1
+        else:
+            buckets.append([minute, 1])
+        self.totals[shard_id] += 1
+
+    def events_per_minute(self, shard_id: int) -> float:
+        """Get a shard's event rate over the last EVENT_RATE_WINDOW seconds."""
+        oldest = int(time.monotonic() // 60) - EVENT_RATE_WINDOW // 60
+        events = sum(count for minute, count in self.buckets.get(shard_id, ()) if minute > oldest)
+        return events / (EVENT_RATE_WINDOW / 60)
+
+    async def on_message(self, message: discord.Message):
+        # DMs are always delivered to shard 0
+        self.record_event(message.guild.shard_id if message.guild else 0)
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        self.record_event(interaction.guild.shard_id if interaction.guild else 0)
+
+    async def on_shard_connect(self, shard_id: int):
+        self.connects[shard_id] += 1
+        self.connected_since[shard_id] = time.monotonic()
+
+    async def on_shard_disconnect(self, shard_id: int):
+        self.disconnects[shard_id] += 1
+        self.connected_since.pop(shard_id, None)
+
+    async def on_shard_resumed(self, shard_id: int):
+        self.resumes[shard_id] += 1
+        self.connected_since.setdefault(shard_id, time.monotonic())
+
+    async def on_connect(self):
+        await self.on_shard_connect(0)
+
+    async def on_disconnect(self):
+        await self.on_shard_disconnect(0)
+
+    async def on_resumed(self):
+        await self.on_shard_resumed(0)
+
+    def report(self, bot: discord.Client) -> List[Dict[str, Any]]:
+        """Build one stats entry per shard this process runs."""
+        if isinstance(bot, discord.AutoShardedClient):
+            latencies = dict(bot.latencies)
+            closed = {shard_id: shard.is_closed() for shard_id, shard in bot.shards.items()}
+        else:
+            latencies = {0: bot.latency}
+            closed = {0: bot.is_closed()}
+
+        guild_counts = Counter(guild.shard_id for guild in bot.guilds)
+        now = time.monotonic()
+        report = []
+        for shard_id in sorted(latencies):
+            connected_since = self.connected_since.get(shard_id)
+            report.append({
+                "shard_id": shard_id,
+                "latency": latencies[shard_id],
+                "guilds": guild_counts.get(shard_id, 0),
+                "events_per_minute": self.events_per_minute(shard_id),
+                "events": self.totals[shard_id],
+                "connects": self.connects[shard_id],
+                "disconnects": self.disconnects[shard_id],
+                "resumes": self.resumes[shard_id],
+                "closed": closed.get(shard_id, True),
+                "uptime": now - connected_since if connected_since is not None else None,
+            })
+        return report
+
+
+# Shared by the bot's listeners and the /shards command
+shard_stats = ShardStats()
+
+
+def parse_shard_ids(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a SHARD_IDS value such as '0,1,2' or '0-3'."""
+    if not value:
+        return None
+
+    shard_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.extend(range(int(start), int(end) + 1))
+        else:
+            shard_ids.append(int(part))
+    return shard_ids
+
+
+def build_bot_options(shard_count: Optional[int], shard_ids: Optional[List[int]]) -> Dict[str, Any]:
+    """Get the AutoShardedBot keyword arguments for the configured shards."""
+    options = {}
+    if shard_count:
+        options['shard_count'] = shard_count
+    if shard_ids:
+        # Explicit ranges need the total count so every process agrees on the split
+        if not shard_count:
+            raise ValueError("SHARD_IDS requires SHARD_COUNT")
+        options['shard_ids'] = shard_ids
+    return options
@@ -0,0 +1,44 @@
+import discord
+from ..domain.script import price_cache
+from ..resilience import breakers, CLOSED, HALF_OPEN
+
+
+async def upstream_status_command(interaction: discord.Interaction):
+    """Show the circuit breaker state and failure rate of each upstream API."""
+    cache_stats = price_cache.stats()
+    if not breakers and not cache_stats['entries']:
+        await interaction.response.send_message("No upstream requests made yet.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="🔌 Upstream Status",
+        description="Circuit breaker state per upstream host",
+        color=0x00ff00
+    )
+
+    for breaker in sorted(breakers.values(), key=lambda breaker: breaker.name)[:24]:
+        stats = breaker.stats()
+        if stats['state'] == CLOSED:
+            status_emoji = "🟢"
+        elif stats['state'] == HALF_OPEN:
+            status_emoji = "🟡"
+        else:
+            status_emoji = "🔴"
+            embed.color = 0xff0000
+
+        upstream_info = f"**State:** {stats['state']}\n"
+        upstream_info += f"**Failure rate:** {stats['failure_rate']:.0%} of recent calls\n"
+        upstream_info += f"**Calls:** {stats['calls']} ({stats['failures']} failed, {stats['rejected']} rejected)"
+        if stats['retry_after']:
+            upstream_info += f"\n**Retrying in:** {stats['retry_after']:.0f}s"
+
+        embed.add_field(name=f"{status_emoji} {stats['name']}", value=upstream_info, inline=True)
+
+    if cache_stats['entries'] or cache_stats['misses']:
+        cache_info = f"**Hit ratio:** {cache_stats['hit_ratio']:.0%} ({cache_stats['stale_hits']} served stale)\n"
+        cache_info += f"**Entries:** {cache_stats['entries']}\n"
+        cache_info += f"**Age:** {cache_stats['mean_age'] / 60:.0f} min mean, {cache_stats['oldest_age'] / 60:.0f} min oldest\n"
+        cache_info += f"**Failed refreshes:** {cache_stats['refresh_failures']}"
+        embed.add_field(name="💾 Registrar price cache", value=cache_info, inline=False)
+
+    await interaction.response.send_message(embed=embed, ephemeral=True)
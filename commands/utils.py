@@ -9,6 +9,58 @@ CLOUDFLARE_API_TOKEN = os.getenv('CLOUDFLARE_API_TOKEN')
 CLOUDFLARE_ACCOUNT_ID = os.getenv('CLOUDFLARE_ACCOUNT_ID')
 CHANNEL_ID = os.getenv('CHANNEL_ID')
 
+# Shared HTTP client for upstream APIs (default timeout in seconds, DNS cache TTL in seconds)
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '10'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_MAX_CONNECTIONS_PER_HOST', '10'))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+# Upstream resilience: retries per GET, failures in a row that open a host's
+# circuit breaker, and seconds before an open breaker tries the host again
+UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', '2'))
+UPSTREAM_BREAKER_THRESHOLD = int(os.getenv('UPSTREAM_BREAKER_THRESHOLD', '5'))
+UPSTREAM_BREAKER_RESET = float(os.getenv('UPSTREAM_BREAKER_RESET', '30'))
+
+# Registrar price cache (seconds an answer is fresh, seconds a stale one may still be
+# served while it refreshes in the background)
+PRICE_CACHE_TTL = float(os.getenv('PRICE_CACHE_TTL', '3600'))
+PRICE_CACHE_STALE_TTL = float(os.getenv('PRICE_CACHE_STALE_TTL', '86400'))
+PRICE_CACHE_MAX_ENTRIES = int(os.getenv('PRICE_CACHE_MAX_ENTRIES', '1000'))
+# Price snapshot: minutes between bulk reloads, TLDs always kept loaded, and
+# how many price lists are fetched at once
+PRICE_SNAPSHOT_MINUTES = float(os.getenv('PRICE_SNAPSHOT_MINUTES', '30'))
+PRICE_SNAPSHOT_TLDS = [tld.strip().lower().lstrip('.') for tld in os.getenv(
+    'PRICE_SNAPSHOT_TLDS', 'com,net,org,io,co,ai,dev,app,me,xyz,top,cn').split(',') if tld.strip()]
+PRICE_SNAPSHOT_CONCURRENCY = int(os.getenv('PRICE_SNAPSHOT_CONCURRENCY', '4'))
+# Hours a looked-up TLD or registrar stays in the snapshot after it was last asked for
+PRICE_SNAPSHOT_IDLE_HOURS = float(os.getenv('PRICE_SNAPSHOT_IDLE_HOURS', '24'))
+
+# Whois lookup limits
+WHOIS_MAX_CONCURRENCY = int(os.getenv('WHOIS_MAX_CONCURRENCY', '50'))
+WHOIS_TIMEOUT = float(os.getenv('WHOIS_TIMEOUT', '15'))
+
+# Whois result cache (TTLs in seconds)
+WHOIS_CACHE_TTL = float(os.getenv('WHOIS_CACHE_TTL', '3600'))
+WHOIS_CACHE_NEGATIVE_TTL = float(os.getenv('WHOIS_CACHE_NEGATIVE_TTL', '300'))
+WHOIS_CACHE_MAX_ENTRIES = int(os.getenv('WHOIS_CACHE_MAX_ENTRIES', '10000'))
+
+# Domain monitor database
+MONITOR_DB = os.getenv('MONITOR_DB', 'domain_monitors.db')
+
+# Domain monitor scheduling (tick interval in minutes, max refreshes per tick)
+MONITOR_TICK_MINUTES = float(os.getenv('MONITOR_TICK_MINUTES', '10'))
+MONITOR_REFRESH_BATCH = int(os.getenv('MONITOR_REFRESH_BATCH', '500'))
+# Target rate of background whois refreshes, per minute (per bot instance)
+MONITOR_REFRESH_RATE = float(os.getenv('MONITOR_REFRESH_RATE', '30'))
+# How long an instance owns a batch of domains it is refreshing, in minutes;
+# keep it above MONITOR_TICK_MINUTES so batches aren't picked up twice
+MONITOR_LEASE_MINUTES = float(os.getenv('MONITOR_LEASE_MINUTES', '30'))
+# How long a sent expiry notification is remembered, in days
+NOTIFICATION_TTL_DAYS = int(os.getenv('NOTIFICATION_TTL_DAYS', '8'))
+# Max expiry notifications being sent at once
+NOTIFY_CONCURRENCY = int(os.getenv('NOTIFY_CONCURRENCY', '10'))
+# Alert subscribers when a refresh sees registrar, nameserver, status or expiry changes
+DOMAIN_CHANGE_ALERTS = os.getenv('DOMAIN_CHANGE_ALERTS', 'true').lower() == 'true'
+
 def trueFalseJudgement(data: str) -> Optional[str]:
   """Convert string boolean to emoji representation."""
   if data == 'true':
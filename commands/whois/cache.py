@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+# Returned by WhoisCache.get when there is no fresh entry
+MISSING = object()
+
+
+class WhoisCache:
+    """In-process whois result cache with TTL expiry and an LRU size bound."""
+
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # domain -> (expires_at, result); result is None for failed lookups
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, domain: str) -> Any:
+        """Get a cached result (possibly None for a failed lookup), or MISSING."""
+        entry = self._entries.get(domain)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[domain]
+            self.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(domain)
+        self.hits += 1
+        return result
+
+    def set(self, domain: str, result: Optional[Dict[str, Any]]):
+        """Cache a lookup result, using the negative TTL for failures."""
+        ttl = self.ttl if result else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        self._entries[domain] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, domain: str):
+        """Drop a cached entry so the next lookup goes upstream."""
+        self._entries.pop(domain, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters for logging."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Optional
+import re
+
+
+def parse_iso_datetime(date_string):
+    """
+    Parse ISO 8601 datetime string with various formats.
+    Supports formats like:
+    - 2024-01-15T10:30:00Z
+    - 2024-01-15T10:30:00.123Z
+    - 2024-01-15T10:30:00+00:00
+    - 2024-01-15T10:30:00.123456+00:00
+    """
+    if not date_string:
+        return None
+    
+    try:
+        # Handle 'Z' suffix (UTC timezone)
+        if date_string.endswith('Z'):
+            date_string = date_string[:-1] + '+00:00'
+        
+        # Parse the datetime
+        # Try with fromisoformat first (Python 3.7+)
+        try:
+            return datetime.fromisoformat(date_string)
+        except ValueError:
+            # Fallback for edge cases
+            # Remove microseconds if they have more than 6 digits
+            date_string = re.sub(r'\.(\d{6})\d+', r'.\1', date_string)
+            return datetime.fromisoformat(date_string)
+            
+    except (ValueError, AttributeError) as e:
+        # If parsing fails, try alternative parsing methods
+        try:
+            # Try parsing without timezone info and assume UTC
+            if '+' in date_string or date_string.endswith('Z'):
+                # Strip timezone info and parse as UTC
+                clean_date = re.sub(r'[+\-]\d{2}:\d{2}$|Z$', '', date_string)
+                dt = datetime.fromisoformat(clean_date)
+                return dt.replace(tzinfo=timezone.utc)
+            else:
+                # Parse as-is and assume UTC
+                dt = datetime.fromisoformat(date_string)
+                return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+        except:
+            return None
+
+
+def to_epoch(date_string) -> Optional[int]:
+    """Convert an ISO 8601 datetime string to epoch seconds, assuming UTC when naive."""
+    parsed_date = parse_iso_datetime(date_string)
+    if not parsed_date:
+        return None
+    if parsed_date.tzinfo is None:
+        parsed_date = parsed_date.replace(tzinfo=timezone.utc)
+    return int(parsed_date.timestamp())
+
+
+def format_epoch(epoch: int, fmt: str = '%Y-%m-%d %H:%M UTC') -> str:
+    """Format epoch seconds as a UTC date string."""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(fmt)
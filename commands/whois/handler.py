@@ -1,53 +1,13 @@
 import discord
 from discord import app_commands
 from .script import checkWhois, add_domain_monitor, remove_domain_monitor, list_monitored_domains, check_expiring_domains
+from .monitor import alert_domain_changes
+from .dates import parse_iso_datetime, format_epoch
 from datetime import datetime, timezone
+import asyncio
+import io
 import json
-import re
-
-
-def parse_iso_datetime(date_string):
-    """
-    Parse ISO 8601 datetime string with various formats.
-    Supports formats like:
-    - 2024-01-15T10:30:00Z
-    - 2024-01-15T10:30:00.123Z
-    - 2024-01-15T10:30:00+00:00
-    - 2024-01-15T10:30:00.123456+00:00
-    """
-    if not date_string:
-        return None
-    
-    try:
-        # Handle 'Z' suffix (UTC timezone)
-        if date_string.endswith('Z'):
-            date_string = date_string[:-1] + '+00:00'
-        
-        # Parse the datetime
-        # Try with fromisoformat first (Python 3.7+)
-        try:
-            return datetime.fromisoformat(date_string)
-        except ValueError:
-            # Fallback for edge cases
-            # Remove microseconds if they have more than 6 digits
-            date_string = re.sub(r'\.(\d{6})\d+', r'.\1', date_string)
-            return datetime.fromisoformat(date_string)
-            
-    except (ValueError, AttributeError) as e:
-        # If parsing fails, try alternative parsing methods
-        try:
-            # Try parsing without timezone info and assume UTC
-            if '+' in date_string or date_string.endswith('Z'):
-                # Strip timezone info and parse as UTC
-                clean_date = re.sub(r'[+\-]\d{2}:\d{2}$|Z$', '', date_string)
-                dt = datetime.fromisoformat(clean_date)
-                return dt.replace(tzinfo=timezone.utc)
-            else:
-                # Parse as-is and assume UTC
-                dt = datetime.fromisoformat(date_string)
-                return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
-        except:
-            return None
+import time
 
 
 def format_domain_date(date_string, field_name="Date"):
@@ -106,7 +66,7 @@ async def whois_command(interaction: discord.Interaction, domain: str):
             await interaction.followup.send(embed=embed)
             return
         
-        result = checkWhois(domain)
+        result = await checkWhois(domain)
         if not result:
             embed = discord.Embed(
                 title="❌ Domain Information Unavailable",
@@ -359,7 +319,7 @@ async def add_monitor_command(interaction: discord.Interaction, domain: str):
             return
         
         # First get domain info
-        domain_info = checkWhois(domain)
+        domain_info = await checkWhois(domain)
         if not domain_info:
             embed = discord.Embed(
                 title="❌ Cannot Add Domain to Monitoring",
@@ -374,7 +334,7 @@ async def add_monitor_command(interaction: discord.Interaction, domain: str):
             await interaction.followup.send(embed=embed)
             return
             
-        success = add_domain_monitor(domain, interaction.user.id, domain_info)
+        success, changed_domains = add_domain_monitor(domain, interaction.user.id, domain_info)
         
         if success:
             embed = discord.Embed(
@@ -402,6 +362,9 @@ async def add_monitor_command(interaction: discord.Interaction, domain: str):
             await interaction.followup.send(embed=embed)
         else:
             await interaction.followup.send(f"❌ Domain {normalized_domain} is already in the monitor list")
+        
+        # The lookup may have found changes the domain's other subscribers haven't heard about
+        await alert_domain_changes(changed_domains)
             
     except Exception as e:
         await interaction.followup.send(f"❌ Error adding domain monitor: {str(e)}")
@@ -444,7 +407,11 @@ async def remove_monitor_command(interaction: discord.Interaction, domain: str):
         await interaction.followup.send(f"❌ Error removing domain monitor: {str(e)}")
 
 
-async def list_monitors_command(interaction: discord.Interaction):
+# Domains shown per /domain-monitor-list page, one embed field each (Discord allows 25)
+LIST_PAGE_SIZE = 25
+
+
+async def list_monitors_command(interaction: discord.Interaction, page: int = 1):
     """List all monitored domains for the user."""
     await interaction.response.defer()
     
@@ -454,55 +421,49 @@ async def list_monitors_command(interaction: discord.Interaction):
         if not domains:
             await interaction.followup.send("📋 You are not monitoring any domains")
             return
-            
+        
+        pages = (len(domains) + LIST_PAGE_SIZE - 1) // LIST_PAGE_SIZE
+        page = min(max(page, 1), pages)
         embed = discord.Embed(
             title=f"📋 Your Domain Monitor List ({len(domains)} domains)",
             color=0x0099ff
         )
+        if pages > 1:
+            embed.set_footer(text=f"Page {page}/{pages} · use the page option to see more")
         
-        for i, domain_data in enumerate(domains, 1):
-            domain = domain_data['domain']
-            expiration_date = domain_data.get('expiration_date', 'Unknown')
-            registrar = domain_data.get('registrar', 'Unknown')
-            registrant_org = domain_data.get('registrant_organization', 'Unknown')
+        now = int(time.time())
+        for record in domains[(page - 1) * LIST_PAGE_SIZE:page * LIST_PAGE_SIZE]:
+            registrar = record.registrar or 'Unknown'
             
-            if expiration_date and expiration_date != 'Unknown':
-                formatted_date, days_until_expiry = format_domain_date(expiration_date, "Expiration Date")
+            if record.expiration_epoch is not None:
+                days_until_expiry = (record.expiration_epoch - now) // 86400
                 
-                if days_until_expiry is not None:
-                    # Set status emoji based on days left
-                    status_emoji = "🟢"  # Green - safe
-                    if days_until_expiry <= 0:
-                        status_emoji = "🚨"  # Expired
-                    elif days_until_expiry <= 7:
-                        status_emoji = "🔴"  # Red - urgent
-                    elif days_until_expiry <= 30:
-                        status_emoji = "🟡"  # Yellow - warning
-                    elif days_until_expiry <= 90:
-                        status_emoji = "🟠"  # Orange - caution
+                # Set status emoji based on days left
+                status_emoji = "🟢"  # Green - safe
+                if days_until_expiry <= 0:
+                    status_emoji = "🚨"  # Expired
+                elif days_until_expiry <= 7:
+                    status_emoji = "🔴"  # Red - urgent
+                elif days_until_expiry <= 30:
+                    status_emoji = "🟡"  # Yellow - warning
+                elif days_until_expiry <= 90:
+                    status_emoji = "🟠"  # Orange - caution
+                
+                # Create detailed info
+                domain_info = f"**Expires:** {format_epoch(record.expiration_epoch)}\n"
+                domain_info += f"**Days Left:** {days_until_expiry}\n"
+                domain_info += f"**Registrar:** {registrar}\n"
+                if record.registrant_organization:
+                    domain_info += f"**Organization:** {record.registrant_organization}"
                     
-                    # Create detailed info
-                    domain_info = f"**Expires:** {formatted_date}\n"
-                    domain_info += f"**Days Left:** {days_until_expiry}\n"
-                    domain_info += f"**Registrar:** {registrar}\n"
-                    if registrant_org and registrant_org != 'Unknown':
-                        domain_info += f"**Organization:** {registrant_org}"
-                        
-                    embed.add_field(
-                        name=f"{status_emoji} {domain}",
-                        value=domain_info,
-                        inline=True
-                    )
-                else:
-                    # Could not parse date but have expiration info
-                    embed.add_field(
-                        name=f"⚪ {domain}",
-                        value=f"**Expires:** {formatted_date}\n**Registrar:** {registrar}",
-                        inline=True
-                    )
+                embed.add_field(
+                    name=f"{status_emoji} {record.domain}",
+                    value=domain_info,
+                    inline=True
+                )
             else:
                 embed.add_field(
-                    name=f"⚪ {domain}",
+                    name=f"⚪ {record.domain}",
                     value=f"Expiration Date: Unknown\nRegistrar: {registrar}",
                     inline=True
                 )
@@ -518,18 +479,22 @@ async def check_domains_now_command(interaction: discord.Interaction):
     await interaction.response.defer()
     
     try:
-        from .script import get_expiring_domains_without_update, get_all_monitored_domains
+        from .script import get_expiring_domains, prioritize_user_domains
         
-        # Get all monitored domains
-        all_monitors = get_all_monitored_domains()
+        # Get the user's monitored domains
         user_id_str = str(interaction.user.id)
         
-        if user_id_str not in all_monitors or not all_monitors[user_id_str]:
+        if not list_monitored_domains(interaction.user.id):
             await interaction.followup.send("📋 You are not monitoring any domains")
             return
         
-        # Check for expiring domains without updating data
-        expiring_domains = get_expiring_domains_without_update()
+        # Only ask the scheduler to refresh these domains first; the refresh
+        # itself still runs in the background at the normal rate
+        queued = prioritize_user_domains(interaction.user.id)
+        refresh_note = f"{queued} domain(s) queued for a priority whois refresh" if queued else None
+        
+        # Check the user's expiring domains without updating data
+        expiring_domains = get_expiring_domains(user_id=interaction.user.id)
         user_expiring = expiring_domains.get(user_id_str, [])
         
         if not user_expiring:
@@ -543,6 +508,8 @@ async def check_domains_now_command(interaction: discord.Interaction):
                 value="No domains expiring in the next 7 days",
                 inline=False
             )
+            if refresh_note:
+                embed.add_field(name="Refresh", value=refresh_note, inline=False)
             await interaction.followup.send(embed=embed)
             return
         
@@ -553,10 +520,10 @@ async def check_domains_now_command(interaction: discord.Interaction):
             color=0xff0000
         )
         
-        for domain_data in user_expiring:
-            domain = domain_data['domain']
-            days_left = domain_data.get('days_until_expiry', 0)
-            registrar = domain_data.get('registrar', 'Unknown')
+        for record in user_expiring:
+            domain = record.domain
+            days_left = record.days_until_expiry
+            registrar = record.registrar or 'Unknown'
             
             if days_left <= 1:
                 status_emoji = "🚨"
@@ -571,8 +538,104 @@ async def check_domains_now_command(interaction: discord.Interaction):
                 inline=True
             )
         
+        if refresh_note:
+            embed.add_field(name="Refresh", value=refresh_note, inline=False)
+        
         embed.set_footer(text=f"Manual check time: {datetime.now().strftime('%Y-%m-%d')}")
         await interaction.followup.send(embed=embed)
         
     except Exception as e:
-        await interaction.followup.send(f"❌ Error checking domains: {str(e)}") 
\ No newline at end of file
+        await interaction.followup.send(f"❌ Error checking domains: {str(e)}") 
+
+# Limits for /domain-monitor-import
+MAX_IMPORT_FILE_SIZE = 1024 * 1024  # 1 MB
+MAX_IMPORT_DOMAINS = 5000
+IMPORT_PROGRESS_INTERVAL = 2  # Seconds between progress message edits
+
+
+async def import_monitors_command(interaction: discord.Interaction, attachment: discord.Attachment):
+    """Import a txt or CSV file of domains into the user's monitoring list."""
+    await interaction.response.defer()
+    
+    try:
+        from .script import validate_domain, add_domain_monitors, iter_domain_list
+        from .store import get_store
+        
+        if not attachment.filename.lower().endswith(('.txt', '.csv')):
+            await interaction.followup.send("❌ Please upload a `.txt` or `.csv` file with one domain per line")
+            return
+        if attachment.size > MAX_IMPORT_FILE_SIZE:
+            await interaction.followup.send(f"❌ File is too large (max {MAX_IMPORT_FILE_SIZE // 1024} KB)")
+            return
+        
+        data = await attachment.read()
+        lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', errors='replace', newline='')
+        
+        # Stream-parse, validate and dedupe, skipping domains the user already monitors
+        existing = get_store().get_user_domain_names(str(interaction.user.id))
+        to_lookup, seen, invalid = [], set(), []
+        already_monitored = 0
+        for raw, normalized_domain in iter_domain_list(lines):
+            if normalized_domain in seen:
+                continue
+            seen.add(normalized_domain)
+            if not validate_domain(normalized_domain):
+                invalid.append(raw)
+            elif normalized_domain in existing:
+                already_monitored += 1
+            else:
+                to_lookup.append(normalized_domain)
+        
+        if len(to_lookup) > MAX_IMPORT_DOMAINS:
+            await interaction.followup.send(
+                f"❌ Too many new domains ({len(to_lookup)}); import at most {MAX_IMPORT_DOMAINS} at a time"
+            )
+            return
+        
+        progress = await interaction.followup.send(
+            f"⏳ Looking up {len(to_lookup)} domains...", wait=True
+        )
+        
+        # Pipeline the whois lookups; checkWhois bounds how many are in flight
+        found = []
+        last_update = time.monotonic()
+        lookups = [asyncio.ensure_future(checkWhois(domain)) for domain in to_lookup]
+        for done, lookup in enumerate(asyncio.as_completed(lookups), 1):
+            domain_info = await lookup
+            if domain_info:
+                found.append(domain_info)
+            
+            if time.monotonic() - last_update >= IMPORT_PROGRESS_INTERVAL:
+                last_update = time.monotonic()
+                await progress.edit(content=f"⏳ Looked up {done}/{len(to_lookup)} domains...")
+        failed = sorted(set(to_lookup) - {domain_info['domain'] for domain_info in found})
+        
+        # Write every new subscription in one transaction
+        added, changed_domains = add_domain_monitors(interaction.user.id, found) if found else (0, {})
+        
+        embed = discord.Embed(
+            title="📥 Domain Import Complete",
+            color=0x00ff00 if not failed and not invalid else 0xffa500
+        )
+        embed.add_field(name="Added", value=str(added), inline=True)
+        embed.add_field(name="Already Monitored", value=str(already_monitored), inline=True)
+        embed.add_field(name="Invalid", value=str(len(invalid)), inline=True)
+        embed.add_field(name="Lookup Failed", value=str(len(failed)), inline=True)
+        if invalid:
+            embed.add_field(
+                name="Invalid Entries",
+                value="\n".join(f"• {raw[:60]}" for raw in invalid[:10]) + (f"\n• ... and {len(invalid) - 10} more" if len(invalid) > 10 else ""),
+                inline=False
+            )
+        if failed:
+            embed.add_field(
+                name="Could Not Retrieve",
+                value="\n".join(f"• {domain}" for domain in failed[:10]) + (f"\n• ... and {len(failed) - 10} more" if len(failed) > 10 else ""),
+                inline=False
+            )
+        
+        await progress.edit(content=None, embed=embed)
+        await alert_domain_changes(changed_domains)
+        
+    except Exception as e:
+        await interaction.followup.send(f"❌ Error importing domains: {str(e)}")
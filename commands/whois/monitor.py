@@ -1,18 +1,58 @@
 import asyncio
+import time
 import discord
 from discord.ext import tasks
-from .script import check_expiring_domains, get_expiring_domains_without_update
-from ..utils import CHANNEL_ID
+from .script import refresh_due_domains, get_expiring_domains, get_expiring_domains_without_update, whois_cache
+from .dates import format_epoch
+from .store import get_store
+from ..utils import CHANNEL_ID, MONITOR_TICK_MINUTES, NOTIFICATION_TTL_DAYS, NOTIFY_CONCURRENCY, DOMAIN_CHANGE_ALERTS
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Discord message limits
+MAX_MESSAGE_LENGTH = 2000
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_FIELDS_PER_EMBED = 25
+MAX_EMBED_LENGTH = 6000
+
+# Seconds between progress log lines while notifications are being sent
+PROGRESS_LOG_INTERVAL = 10
+
+
+def add_fields_within_limits(embed: discord.Embed, fields: list, more_field) -> int:
+    """
+    Add (name, value, inline) fields to an embed until the next one would pass Discord's
+    field count or total length limit, then add the (name, value) field `more_field(remaining)`
+    returns in its place. Returns how many of the fields were added.
+    """
+    # Room kept for the closing field, sized for the largest count it could show
+    reserve = sum(map(len, more_field(len(fields))))
+    for shown, (name, value, inline) in enumerate(fields):
+        last = shown == len(fields) - 1
+        if (len(embed.fields) >= MAX_FIELDS_PER_EMBED - (0 if last else 1)
+                or len(embed) + len(name) + len(value) > MAX_EMBED_LENGTH - (0 if last else reserve)):
+            more_name, more_value = more_field(len(fields) - shown)
+            embed.add_field(name=more_name, value=more_value, inline=False)
+            return shown
+        embed.add_field(name=name, value=value, inline=inline)
+    return len(fields)
+
 
 class DomainMonitor:
     def __init__(self, bot):
         self.bot = bot
-        self.sent_notifications = set()  # Track sent notifications to prevent duplicates
+        # Sent notifications are tracked in the store's dedup ledger, which
+        # survives restarts; drop entries that have outlived their TTL
+        pruned = get_store().prune_notifications(int(time.time()))
+        if pruned:
+            logger.info(f"Pruned {pruned} expired notification ledger entries")
+        # Fallback channel for users with DMs disabled, resolved on first use
+        self.notification_channel = None
+        # Background startup check, so it can be cancelled on shutdown
+        self.startup_task = None
         # Don't start immediately, wait for bot to be ready
     
     def start_monitoring(self):
@@ -23,12 +63,26 @@ class DomainMonitor:
     def cog_unload(self):
         self.check_expiring.cancel()
     
-    def _get_notification_key(self, user_id: str, domain: str, days_left: int) -> str:
-        """Generate a unique key for notification tracking."""
-        return f"{user_id}:{domain}:{days_left}"
+    def start_startup_check(self):
+        """Run the startup check as a background task, so it doesn't hold up readiness."""
+        if self.startup_task is None:
+            self.startup_task = asyncio.create_task(self.check_on_startup(), name="domain-startup-check")
+        return self.startup_task
+    
+    async def stop(self):
+        """Stop the monitoring loop and cancel a startup check that's still running."""
+        self.check_expiring.cancel()
+        if self.startup_task is not None and not self.startup_task.done():
+            self.startup_task.cancel()
+            try:
+                await self.startup_task
+            except asyncio.CancelledError:
+                pass
+            logger.info("Cancelled the startup domain check")
     
     async def check_on_startup(self):
         """Check domains immediately when bot starts."""
+        await self.bot.wait_until_ready()
         try:
             logger.info("Performing startup domain check...")
             expiring_domains = get_expiring_domains_without_update()
@@ -38,40 +92,32 @@ class DomainMonitor:
                 return
             
             # Send notifications to users via DM
-            for user_id, domains in expiring_domains.items():
-                try:
-                    user = await self.bot.fetch_user(int(user_id))
-                    if user:
-                        await self.send_expiry_notification(user, domains, is_startup=True)
-                except Exception as e:
-                    logger.error(f"Failed to send startup notification for user {user_id}: {e}")
-            
-            logger.info(f"Sent startup notifications to {len(expiring_domains)} users")
+            await self.dispatch_notifications(expiring_domains, is_startup=True)
+            logger.info("Startup domain check completed")
             
         except Exception as e:
             logger.error(f"Error in startup domain check: {e}")
     
-    @tasks.loop(hours=12)  # 每12小时检查一次
+    @tasks.loop(minutes=MONITOR_TICK_MINUTES)  # Only domains that are due get refreshed each tick
     async def check_expiring(self):
         """Check for expiring domains and send notifications."""
         try:
             logger.info("Checking for expiring domains...")
-            expiring_domains = check_expiring_domains()
+            get_store().prune_notifications(int(time.time()))
+            changed_domains = await refresh_due_domains()
+            logger.info(f"Whois cache stats: {whois_cache.stats()}")
+            
+            if changed_domains and DOMAIN_CHANGE_ALERTS:
+                await self.dispatch_notifications(changed_domains, send=self.send_change_alert)
+            
+            expiring_domains = get_expiring_domains()
             
             if not expiring_domains:
                 logger.info("No expiring domains found")
                 return
             
             # Send notifications to users via DM
-            for user_id, domains in expiring_domains.items():
-                try:
-                    user = await self.bot.fetch_user(int(user_id))
-                    if user:
-                        await self.send_expiry_notification(user, domains)
-                except Exception as e:
-                    logger.error(f"Failed to send notification for user {user_id}: {e}")
-            
-            logger.info(f"Sent DM notifications to {len(expiring_domains)} users")
+            await self.dispatch_notifications(expiring_domains)
             
         except Exception as e:
             logger.error(f"Error in domain monitoring task: {e}")
@@ -81,71 +127,175 @@ class DomainMonitor:
         """Wait until the bot is ready before starting the task."""
         await self.bot.wait_until_ready()
     
-    async def send_expiry_notification(self, user: discord.User, domains: list, is_startup=False):
-        """Send expiry notification to user via DM."""
+    async def resolve_user(self, user_id: str):
+        """Get a user from the client cache, falling back to a REST fetch."""
+        user = self.bot.get_user(int(user_id))
+        if user is None:
+            user = await self.bot.fetch_user(int(user_id))
+        return user
+    
+    async def dispatch_notifications(self, expiring_domains: dict, is_startup=False, send=None) -> dict:
+        """
+        Notify every user concurrently, at most NOTIFY_CONCURRENCY at a time.
+        discord.py queues requests per rate-limit bucket, so Discord's per-route
+        limits are respected. Logs and returns the cycle's throughput and latency.
+        `send` defaults to send_expiry_notification, whose dedup ledger keys are claimed
+        up front so users with nothing new are never looked up; send_change_alert and
+        the domain package's send_price_alert are the other senders.
+        """
+        release = None
+        if send is None:
+            send = self.send_expiry_notification
+            release = self.release_expiry_claims
+            expiring_domains = self.claim_expiry_notifications(expiring_domains)
+        semaphore = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+        latencies = []
+        failures = 0
+        last_progress = time.perf_counter()
+        # Users with DMs disabled, posted to the channel together at the end
+        channel_fallback = []
+        
+        async def notify(user_id: str, domains: list):
+            nonlocal failures, last_progress
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    try:
+                        user = await self.resolve_user(user_id)
+                    except Exception:
+                        if release:
+                            release(user_id, domains)
+                        raise
+                    await send(user, domains, is_startup=is_startup, channel_fallback=channel_fallback)
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Failed to send {'startup ' if is_startup else ''}notification for user {user_id}: {e}")
+                finally:
+                    finished = time.perf_counter()
+                    latencies.append(finished - started)
+                    # Long cycles (e.g. a big startup check) report progress as they go
+                    if finished - last_progress >= PROGRESS_LOG_INTERVAL:
+                        last_progress = finished
+                        logger.info(
+                            f"{'Startup n' if is_startup else 'N'}otifications: "
+                            f"{len(latencies)}/{len(expiring_domains)} users done, {failures} failed"
+                        )
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(notify(user_id, domains) for user_id, domains in expiring_domains.items()))
+        await self.send_channel_notifications(channel_fallback, is_startup)
+        elapsed = time.perf_counter() - started
+        
+        latencies.sort()
+        stats = {
+            "users": len(expiring_domains),
+            "failures": failures,
+            "elapsed": elapsed,
+            "per_second": len(expiring_domains) / elapsed if elapsed else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        }
+        logger.info(
+            f"Sent {'startup ' if is_startup else ''}notifications to {stats['users']} users "
+            f"({stats['failures']} failed) in {stats['elapsed']:.2f}s, {stats['per_second']:.1f} users/s, "
+            f"latency p50 {stats['p50'] * 1000:.0f}ms / p95 {stats['p95'] * 1000:.0f}ms / max {stats['max'] * 1000:.0f}ms"
+        )
+        return stats
+    
+    def claim_expiry_notifications(self, expiring_domains: dict) -> dict:
+        """
+        Claim the (domain, days_left) ledger keys of every user's expiring domains,
+        returning only the users and domains that weren't notified about recently.
+        """
+        claimed = get_store().claim_user_notifications(
+            {
+                user_id: [(record.domain, record.days_until_expiry) for record in domains]
+                for user_id, domains in expiring_domains.items()
+            },
+            int(time.time()) + NOTIFICATION_TTL_DAYS * 86400
+        )
+        new_domains = {}
+        for user_id, keys in claimed.items():
+            claimed_keys = set(keys)
+            new_domains[user_id] = [
+                record for record in expiring_domains[user_id]
+                if (record.domain, record.days_until_expiry) in claimed_keys
+            ]
+        skipped = len(expiring_domains) - len(new_domains)
+        if skipped:
+            logger.info(f"No new notifications to send to {skipped} users")
+        return new_domains
+    
+    def release_expiry_claims(self, user_id: str, domains: list):
+        """Release the ledger keys of expiry notifications that weren't delivered, so they're retried."""
         try:
-            title = "⚠️ Domain Expiry Reminder"
-            if is_startup:
-                title = "🚀 Startup Domain Check - Expiry Reminder"
-                
-            embed = discord.Embed(
-                title=title,
-                description="The following domains will expire in 7 days:",
-                color=0xff0000
+            get_store().release_notifications(
+                user_id, [(record.domain, record.days_until_expiry) for record in domains]
             )
+        except Exception as e:
+            logger.error(f"Failed to release notification claims for user {user_id}: {e}")
+    
+    def build_expiry_embed(self, domains: list, description: str, is_startup=False) -> discord.Embed:
+        """Build the expiry reminder embed for one user's domains."""
+        title = "⚠️ Domain Expiry Reminder"
+        if is_startup:
+            title = "🚀 Startup Domain Check - Expiry Reminder"
             
-            # Filter out domains that we've already notified about recently
-            new_domains = []
-            for domain_data in domains:
-                domain = domain_data['domain']
-                days_left = domain_data.get('days_until_expiry', 0)
-                notification_key = self._get_notification_key(str(user.id), domain, days_left)
-                
-                # Only send notification if we haven't sent it recently
-                if notification_key not in self.sent_notifications:
-                    new_domains.append(domain_data)
-                    self.sent_notifications.add(notification_key)
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=0xff0000
+        )
+        
+        footer_text = f"Check time: {datetime.now().strftime('%Y-%m-%d')}"
+        if is_startup:
+            footer_text += " (Startup Check)"
+        # Set before the fields, so it counts towards the length they may use
+        embed.set_footer(text=footer_text)
+        
+        # One field per domain, ending with how many didn't fit
+        fields = []
+        for record in domains:
+            days_left = record.days_until_expiry
             
-            if not new_domains:
-                logger.info(f"No new notifications to send to {user.name}")
-                return
+            if days_left <= 1:
+                status_emoji = "🚨"  # Emergency
+            elif days_left <= 3:
+                status_emoji = "🔴"  # Critical
+            else:
+                status_emoji = "🟡"  # Warning
             
-            for domain_data in new_domains:
-                domain = domain_data['domain']
-                days_left = domain_data.get('days_until_expiry', 0)
-                registrar = domain_data.get('registrar', 'Unknown')
-                registrant_org = domain_data.get('registrant_organization', 'Unknown')
-                creation_date = domain_data.get('creation_date', 'Unknown')
-                
-                if days_left <= 1:
-                    status_emoji = "🚨"  # Emergency
-                elif days_left <= 3:
-                    status_emoji = "🔴"  # Critical
-                else:
-                    status_emoji = "🟡"  # Warning
-                
-                # Create detailed domain info
-                domain_info = f"**Remaining time:** {days_left} days\n"
-                domain_info += f"**Registrar:** {registrar}\n"
-                if registrant_org and registrant_org != 'Unknown':
-                    domain_info += f"**Organization:** {registrant_org}\n"
-                if creation_date and creation_date != 'Unknown':
-                    try:
-                        creation_dt = datetime.fromisoformat(creation_date.replace('Z', '+00:00'))
-                        domain_info += f"**Created:** {creation_dt.strftime('%Y-%m-%d')}"
-                    except:
-                        pass
-                
-                embed.add_field(
-                    name=f"{status_emoji} {domain}",
-                    value=domain_info,
-                    inline=True
-                )
+            # Create detailed domain info
+            domain_info = f"**Remaining time:** {days_left} days\n"
+            domain_info += f"**Registrar:** {record.registrar or 'Unknown'}\n"
+            if record.registrant_organization:
+                domain_info += f"**Organization:** {record.registrant_organization}\n"
+            if record.creation_epoch is not None:
+                domain_info += f"**Created:** {format_epoch(record.creation_epoch, '%Y-%m-%d')}"
             
-            footer_text = f"Check time: {datetime.now().strftime('%Y-%m-%d')}"
-            if is_startup:
-                footer_text += " (Startup Check)"
-            embed.set_footer(text=footer_text)
+            fields.append((f"{status_emoji} {record.domain}", domain_info[:1024], True))
+        add_fields_within_limits(
+            embed, fields,
+            lambda remaining: (f"…and {remaining} more", "Use `/domain-monitor-list` to see every domain")
+        )
+        return embed
+    
+    async def send_expiry_notification(self, user: discord.User, domains: list, is_startup=False,
+                                       channel_fallback: list = None):
+        """
+        Send expiry notification to user via DM.
+        The domains' dedup ledger keys were claimed by claim_expiry_notifications.
+        If DMs are disabled and channel_fallback is given, (user, embed, keys) is appended
+        to it so the caller can post all fallbacks together; otherwise it's posted now.
+        Claims are released if the notification can't be delivered,
+        so it's retried on the next check instead of being suppressed for the TTL.
+        """
+        try:
+            claimed = [(record.domain, record.days_until_expiry) for record in domains]
+            embed = self.build_expiry_embed(
+                domains, "The following domains will expire in 7 days:", is_startup
+            )
             
             # Try to send DM first
             try:
@@ -154,79 +304,161 @@ class DomainMonitor:
             except discord.Forbidden:
                 logger.warning(f"Cannot send DM to {user.name}, user has DMs disabled")
                 # If user has DMs disabled, mention them in channel
-                await self.send_channel_notification(user, new_domains, is_startup)
+                channel_embed = self.build_expiry_embed(
+                    domains, f"{user.mention} The following domains will expire in 7 days:", is_startup
+                )
+                if channel_fallback is not None:
+                    channel_fallback.append((user, channel_embed, claimed))
+                else:
+                    await self.send_channel_notifications([(user, channel_embed, claimed)], is_startup)
+            except Exception:
+                self.release_expiry_claims(str(user.id), domains)
+                raise
                 
         except Exception as e:
             logger.error(f"Error sending notification to {user.name}: {e}")
     
-    async def send_channel_notification(self, user: discord.User, domains: list, is_startup=False):
-        """Send notification to channel when DM fails."""
+    def build_change_embed(self, domains: list, description: str) -> discord.Embed:
+        """Build the whois change alert embed for one user's domains."""
+        embed = discord.Embed(
+            title="🔄 Domain Change Alert",
+            description=description,
+            color=0xffa500
+        )
+        
+        embed.set_footer(text=f"Check time: {datetime.now().strftime('%Y-%m-%d')}")
+        add_fields_within_limits(
+            embed,
+            [
+                (record.domain, "\n".join(f"• {change}" for change in record.changes)[:1024], False)
+                for record in domains
+            ],
+            lambda remaining: (f"…and {remaining} more changed domains", "\u200b")
+        )
+        return embed
+    
+    async def send_change_alert(self, user: discord.User, domains: list, is_startup=False,
+                                channel_fallback: list = None):
+        """
+        Tell a user that the whois data of their domains changed.
+        Each change is stored once, so it's only reported by the refresh that saw it.
+        """
+        try:
+            embed = self.build_change_embed(domains, "The whois data of these domains changed:")
+            try:
+                await user.send(embed=embed)
+                logger.info(f"Sent change alert to {user.name}")
+            except discord.Forbidden:
+                logger.warning(f"Cannot send DM to {user.name}, user has DMs disabled")
+                channel_embed = self.build_change_embed(
+                    domains, f"{user.mention} The whois data of these domains changed:"
+                )
+                if channel_fallback is not None:
+                    channel_fallback.append((user, channel_embed, ()))
+                else:
+                    await self.send_channel_notifications([(user, channel_embed, ())])
+                
+        except Exception as e:
+            logger.error(f"Error sending change alert to {user.name}: {e}")
+    
+    async def get_notification_channel(self):
+        """Get the fallback notification channel, resolving it only once."""
+        if self.notification_channel is None:
+            self.notification_channel = self.bot.get_channel(int(CHANNEL_ID))
+            if self.notification_channel is None:
+                self.notification_channel = await self.bot.fetch_channel(int(CHANNEL_ID))
+        return self.notification_channel
+    
+    async def send_channel_notifications(self, entries: list, is_startup=False):
+        """
+        Post the (user, embed, keys) notifications of every user who couldn't be DMed to the channel.
+        Embeds are packed into as few messages as Discord's limits allow
+        (10 embeds and 6000 embed characters per message), with the users
+        mentioned in the message content so they get pinged. The dedup ledger
+        keys of notifications that couldn't be posted are released.
+        """
+        if not entries:
+            return
+        
         if not CHANNEL_ID:
             logger.error("CHANNEL_ID not configured, cannot send channel notification")
+            self.release_claims(entries)
             return
-            
+        
+        # Pack each user's embed into messages without exceeding the limits
+        messages = []
+        message_entries, embed_chars = [], 0
+        for entry in entries:
+            user, embed, _ = entry
+            content_length = len(" ".join([queued.mention for queued, _, _ in message_entries] + [user.mention]))
+            if message_entries and (
+                len(message_entries) >= MAX_EMBEDS_PER_MESSAGE
+                or embed_chars + len(embed) > MAX_EMBED_CHARS_PER_MESSAGE
+                or content_length > MAX_MESSAGE_LENGTH
+            ):
+                messages.append(message_entries)
+                message_entries, embed_chars = [], 0
+            message_entries.append(entry)
+            embed_chars += len(embed)
+        messages.append(message_entries)
+        
         try:
-            channel = await self.bot.fetch_channel(int(CHANNEL_ID))
-            if not channel:
-                logger.error(f"Could not find channel with ID: {CHANNEL_ID}")
-                return
-                
-            title = "⚠️ Domain Expiry Reminder"
-            if is_startup:
-                title = "🚀 Startup Domain Check - Expiry Reminder"
-                
-            embed = discord.Embed(
-                title=title,
-                description=f"{user.mention} The following domains will expire in 7 days:",
-                color=0xff0000
-            )
-            
-            for domain_data in domains:
-                domain = domain_data['domain']
-                days_left = domain_data.get('days_until_expiry', 0)
-                registrar = domain_data.get('registrar', 'Unknown')
-                registrant_org = domain_data.get('registrant_organization', 'Unknown')
-                creation_date = domain_data.get('creation_date', 'Unknown')
-                
-                if days_left <= 1:
-                    status_emoji = "🚨"
-                elif days_left <= 3:
-                    status_emoji = "🔴"
-                else:
-                    status_emoji = "🟡"
-                
-                # Create detailed domain info
-                domain_info = f"**Remaining time:** {days_left} days\n"
-                domain_info += f"**Registrar:** {registrar}\n"
-                if registrant_org and registrant_org != 'Unknown':
-                    domain_info += f"**Organization:** {registrant_org}\n"
-                if creation_date and creation_date != 'Unknown':
-                    try:
-                        creation_dt = datetime.fromisoformat(creation_date.replace('Z', '+00:00'))
-                        domain_info += f"**Created:** {creation_dt.strftime('%Y-%m-%d')}"
-                    except:
-                        pass
-                
-                embed.add_field(
-                    name=f"{status_emoji} {domain}",
-                    value=domain_info,
-                    inline=True
-                )
-            
-            footer_text = f"Check time: {datetime.now().strftime('%Y-%m-%d')}"
-            if is_startup:
-                footer_text += " (Startup Check)"
-            embed.set_footer(text=footer_text)
-            
-            await channel.send(embed=embed)
-            logger.info(f"Sent {'startup ' if is_startup else ''}channel notification for {user.name}")
-            
+            channel = await self.get_notification_channel()
         except Exception as e:
-            logger.error(f"Error sending channel notification for {user.name}: {e}")
+            logger.error(f"Error resolving notification channel {CHANNEL_ID}: {e}")
+            channel = None
+        if not channel:
+            logger.error(f"Could not find channel with ID: {CHANNEL_ID}")
+            self.release_claims(entries)
+            return
+        
+        # Each message is sent on its own, so one failure doesn't drop the rest
+        failed = 0
+        for message_entries in messages:
+            try:
+                await channel.send(
+                    content=" ".join(user.mention for user, _, _ in message_entries),
+                    embeds=[embed for _, embed, _ in message_entries]
+                )
+            except Exception as e:
+                failed += 1
+                logger.error(f"Error sending channel notifications for {len(message_entries)} users: {e}")
+                self.release_claims(message_entries)
+        
+        logger.info(
+            f"Sent {'startup ' if is_startup else ''}channel notifications for "
+            f"{len(entries)} users in {len(messages) - failed}/{len(messages)} messages"
+        )
+    
+    def release_claims(self, entries: list):
+        """Release the dedup ledger keys of (user, embed, keys) notifications that weren't delivered."""
+        for user, _, keys in entries:
+            if keys:
+                try:
+                    get_store().release_notifications(str(user.id), keys)
+                except Exception as e:
+                    logger.error(f"Failed to release notification claims for {user.name}: {e}")
+
+
+# The running monitor, for alerts raised outside its loop
+_domain_monitor = None
 
 
 def setup_domain_monitor(bot):
     """Setup domain monitoring for the bot."""
+    global _domain_monitor
     monitor = DomainMonitor(bot)
     monitor.start_monitoring()
-    return monitor 
\ No newline at end of file
+    _domain_monitor = monitor
+    return monitor
+
+
+def get_domain_monitor():
+    """Get the running monitor, or None if monitoring isn't set up."""
+    return _domain_monitor
+
+
+async def alert_domain_changes(changed_domains: dict):
+    """Send change alerts found outside the monitor loop, e.g. when a monitored domain is added again."""
+    if changed_domains and DOMAIN_CHANGE_ALERTS and _domain_monitor is not None:
+        await _domain_monitor.dispatch_notifications(changed_domains, send=_domain_monitor.send_change_alert) 
\ No newline at end of file
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import sys
+from typing import Optional, Dict, Any, List, Tuple
+
+from .dates import to_epoch, format_epoch
+
+# Whois fields whose changes are worth alerting on; the fingerprint covers exactly these
+TRACKED_FIELDS = (
+    "expiration_epoch",
+    "registrar",
+    "registrant_organization",
+    "registrant_country",
+    "name_servers",
+    "status",
+    "dnssec",
+)
+
+
+def _intern(value: Any) -> Optional[str]:
+    """Intern a repeated string value so records share one copy."""
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+def _intern_tuple(value: Any) -> Tuple[str, ...]:
+    """Turn a whois list field (or single value) into a tuple of interned strings."""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (sys.intern(value),)
+    return tuple(sys.intern(str(item)) for item in value)
+
+
+def _format_date(epoch: Optional[int]) -> str:
+    return format_epoch(epoch, '%Y-%m-%d') if epoch is not None else 'Unknown'
+
+
+class MonitorRecord:
+    """
+    A monitored domain as held in memory.
+    Dates are epoch seconds parsed once at ingest; registrar, status and
+    name server strings are interned since they repeat across domains.
+    """
+
+    __slots__ = (
+        "domain",
+        "added_epoch",
+        "expiration_epoch",
+        "creation_epoch",
+        "updated_epoch",
+        "checked_epoch",
+        "next_check_epoch",
+        "registrar",
+        "registrant_organization",
+        "registrant_country",
+        "name_servers",
+        "status",
+        "dnssec",
+        "fingerprint",
+        "days_until_expiry",
+        "changes",
+        "previous_fingerprint",
+    )
+
+    def __init__(self, domain: str, added_epoch: Optional[int] = None,
+                 expiration_epoch: Optional[int] = None, creation_epoch: Optional[int] = None,
+                 updated_epoch: Optional[int] = None, checked_epoch: Optional[int] = None,
+                 next_check_epoch: int = 0, registrar: Optional[str] = None,
+                 registrant_organization: Optional[str] = None, registrant_country: Optional[str] = None,
+                 name_servers: Tuple[str, ...] = (), status: Tuple[str, ...] = (),
+                 dnssec: Optional[str] = None, fingerprint: Optional[str] = None):
+        self.domain = domain
+        self.added_epoch = added_epoch
+        self.expiration_epoch = expiration_epoch
+        self.creation_epoch = creation_epoch
+        self.updated_epoch = updated_epoch
+        self.checked_epoch = checked_epoch
+        self.next_check_epoch = next_check_epoch
+        self.registrar = registrar
+        self.registrant_organization = registrant_organization
+        self.registrant_country = registrant_country
+        self.name_servers = name_servers
+        self.status = status
+        self.dnssec = dnssec
+        self.fingerprint = fingerprint
+        # Set by expiry queries, relative to the time of the query
+        self.days_until_expiry = None
+        # Set by a refresh that changed tracked fields, with the fingerprint it replaces
+        self.changes = []
+        self.previous_fingerprint = None
+
+    def compute_fingerprint(self) -> str:
+        """Hash the tracked fields into a short digest, so a refresh can tell if anything changed."""
+        values = tuple(getattr(self, field) for field in TRACKED_FIELDS)
+        return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+    def describe_changes(self, previous: "MonitorRecord") -> List[str]:
+        """List human-readable changes of the tracked fields since `previous`."""
+        changes = []
+        if self.expiration_epoch != previous.expiration_epoch:
+            changes.append(
+                f"Expiry changed: {_format_date(previous.expiration_epoch)} → {_format_date(self.expiration_epoch)}"
+            )
+        if self.registrar != previous.registrar:
+            changes.append(f"Registrar changed: {previous.registrar or 'Unknown'} → {self.registrar or 'Unknown'}")
+        if self.registrant_organization != previous.registrant_organization:
+            changes.append(
+                f"Organization changed: {previous.registrant_organization or 'Unknown'} → "
+                f"{self.registrant_organization or 'Unknown'}"
+            )
+        if self.registrant_country != previous.registrant_country:
+            changes.append(
+                f"Country changed: {previous.registrant_country or 'Unknown'} → {self.registrant_country or 'Unknown'}"
+            )
+        if set(self.name_servers) != set(previous.name_servers):
+            changes.append(f"Nameservers changed: {', '.join(self.name_servers) or 'none'}")
+        for status in self.status:
+            if status not in previous.status:
+                changes.append(f"{status} added")
+        for status in previous.status:
+            if status not in self.status:
+                changes.append(f"{status} removed")
+        if self.dnssec != previous.dnssec:
+            changes.append(f"DNSSEC changed: {previous.dnssec or 'Unknown'} → {self.dnssec or 'Unknown'}")
+        return changes
+
+    def apply_whois(self, whois_info: Dict[str, Any], checked_epoch: int):
+        """Update the record from a checkWhois result, parsing its dates once."""
+        self.expiration_epoch = to_epoch(whois_info.get('expiration_date'))
+        self.creation_epoch = to_epoch(whois_info.get('creation_date'))
+        self.updated_epoch = to_epoch(whois_info.get('updated_date'))
+        self.registrar = _intern(whois_info.get('registrar'))
+        self.registrant_organization = whois_info.get('registrant_organization')
+        self.registrant_country = _intern(whois_info.get('registrant_country'))
+        self.name_servers = _intern_tuple(whois_info.get('name_servers'))
+        self.status = _intern_tuple(whois_info.get('status'))
+        self.dnssec = _intern(whois_info.get('dnssec'))
+        self.checked_epoch = checked_epoch
+        self.fingerprint = self.compute_fingerprint()
+
+    @classmethod
+    def from_whois(cls, domain: str, whois_info: Dict[str, Any], now: int) -> "MonitorRecord":
+        """Build a new record from a checkWhois result."""
+        record = cls(domain, added_epoch=now)
+        record.apply_whois(whois_info, now)
+        return record
+
+    @classmethod
+    def from_legacy(cls, domain_data: Dict[str, Any]) -> "MonitorRecord":
+        """Build a record from an entry of the old JSON monitor file."""
+        record = cls(domain_data['domain'], added_epoch=to_epoch(domain_data.get('added_date')))
+        record.apply_whois(domain_data, to_epoch(domain_data.get('last_checked')))
+        return record
+
+    @classmethod
+    def from_row(cls, row) -> "MonitorRecord":
+        """Build a record from a domains row, joined with subscriptions when added_epoch is present."""
+        keys = row.keys()
+        return cls(
+            row["domain"],
+            added_epoch=row["added_epoch"] if "added_epoch" in keys else None,
+            expiration_epoch=row["expiration_epoch"],
+            creation_epoch=row["creation_epoch"],
+            updated_epoch=row["updated_epoch"],
+            checked_epoch=row["checked_epoch"],
+            next_check_epoch=row["next_check_epoch"],
+            registrar=_intern(row["registrar"]),
+            registrant_organization=row["registrant_organization"],
+            registrant_country=_intern(row["registrant_country"]),
+            name_servers=_intern_tuple(json.loads(row["name_servers"]) if row["name_servers"] else None),
+            status=_intern_tuple(json.loads(row["status"]) if row["status"] else None),
+            dnssec=_intern(row["dnssec"]),
+            fingerprint=row["fingerprint"],
+        )
+
+    def __repr__(self):
+        return f"MonitorRecord({self.domain!r}, expiration_epoch={self.expiration_epoch!r})"
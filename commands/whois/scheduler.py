@@ -0,0 +1,97 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Retry delay after a failed whois lookup
+RETRY_DELAY = 1 * HOUR
+
+# Refresh intervals by days until expiry: (upper bound in days, interval in seconds).
+# Domains close to expiry, or in their post-expiry grace/redemption period, are
+# checked often so renewals are noticed quickly; far-off expiries are checked rarely.
+REFRESH_TIERS = (
+    (-45, 7 * DAY),     # Long expired, unlikely to change soon
+    (7, 6 * HOUR),      # Grace period or expiring within a week
+    (30, 1 * DAY),
+    (90, 3 * DAY),
+    (365, 7 * DAY),
+)
+FAR_FUTURE_INTERVAL = 30 * DAY
+UNKNOWN_EXPIRY_INTERVAL = 1 * DAY
+
+# Fraction of each interval randomized so refreshes don't line up in bursts
+SCHEDULE_JITTER = 0.1
+
+
+def refresh_interval(expiration_epoch: Optional[int], now: int) -> int:
+    """Get how long to wait before refreshing a domain, based on its distance to expiry."""
+    if expiration_epoch is None:
+        return UNKNOWN_EXPIRY_INTERVAL
+
+    days_until_expiry = (expiration_epoch - now) // DAY
+    for max_days, interval in REFRESH_TIERS:
+        if days_until_expiry <= max_days:
+            return interval
+    return FAR_FUTURE_INTERVAL
+
+
+def jittered(interval: float) -> int:
+    """Randomize an interval by +/- SCHEDULE_JITTER."""
+    return int(interval * random.uniform(1 - SCHEDULE_JITTER, 1 + SCHEDULE_JITTER))
+
+
+def next_check_time(expiration_epoch: Optional[int], now: int) -> int:
+    """Get the epoch time at which a domain should next be refreshed."""
+    return now + jittered(refresh_interval(expiration_epoch, now))
+
+
+class TokenBucket:
+    """
+    Paces background work to a target rate.
+    After the upstream signals overload, all acquirers pause with exponential backoff.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = 1,
+                 base_backoff: float = 5, max_backoff: float = 300):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.backoff_level = 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def backoff(self) -> float:
+        """Pause acquisitions after a rate limit or server error, returning the delay."""
+        delay = min(self.max_backoff, self.base_backoff * 2 ** self.backoff_level)
+        delay = random.uniform(delay / 2, delay)
+        self.backoff_level += 1
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+    def reset_backoff(self):
+        """Forget earlier backoff once the upstream answers normally again."""
+        self.backoff_level = 0
@@ -1,71 +1,55 @@
 from ..utils import *
-from cloudflare import Cloudflare
-from typing import Optional, Dict, Any, List
-import json
-import os
-from datetime import datetime, timedelta, timezone
+from .cache import WhoisCache, MISSING
+from .dates import parse_iso_datetime
+from .record import MonitorRecord
+from .scheduler import next_check_time, jittered, RETRY_DELAY, TokenBucket
+from .store import get_store
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+import asyncio
+import copy
+import csv
+import time
 import re
 from urllib.parse import quote
 
-client = Cloudflare(
-    api_token=CLOUDFLARE_API_TOKEN
+# Cloudflare client, created on the first lookup so importing this module
+# doesn't load the Cloudflare SDK
+_client = None
+
+# Bound the number of whois lookups in flight at once
+whois_semaphore = asyncio.Semaphore(WHOIS_MAX_CONCURRENCY)
+
+# Shared whois result cache used by every checkWhois caller
+whois_cache = WhoisCache(
+    ttl=WHOIS_CACHE_TTL,
+    negative_ttl=WHOIS_CACHE_NEGATIVE_TTL,
+    max_entries=WHOIS_CACHE_MAX_ENTRIES
 )
 
-# 监控数据文件路径
-MONITOR_FILE = "domain_monitors.json"
+# Paces background monitor refreshes; backs off when Cloudflare is overloaded
+refresh_limiter = TokenBucket(rate_per_minute=MONITOR_REFRESH_RATE)
 
+SECONDS_PER_DAY = 86400
 
-def parse_iso_datetime(date_string):
-    """
-    Parse ISO 8601 datetime string with various formats.
-    Supports formats like:
-    - 2024-01-15T10:30:00Z
-    - 2024-01-15T10:30:00.123Z
-    - 2024-01-15T10:30:00+00:00
-    - 2024-01-15T10:30:00.123456+00:00
-    """
-    if not date_string:
-        return None
-    
-    try:
-        # Handle 'Z' suffix (UTC timezone)
-        if date_string.endswith('Z'):
-            date_string = date_string[:-1] + '+00:00'
-        
-        # Parse the datetime
-        # Try with fromisoformat first (Python 3.7+)
-        try:
-            return datetime.fromisoformat(date_string)
-        except ValueError:
-            # Fallback for edge cases
-            # Remove microseconds if they have more than 6 digits
-            date_string = re.sub(r'\.(\d{6})\d+', r'.\1', date_string)
-            return datetime.fromisoformat(date_string)
-            
-    except (ValueError, AttributeError) as e:
-        # If parsing fails, try alternative parsing methods
-        try:
-            # Try parsing without timezone info and assume UTC
-            if '+' in date_string or date_string.endswith('Z'):
-                # Strip timezone info and parse as UTC
-                clean_date = re.sub(r'[+\-]\d{2}:\d{2}$|Z$', '', date_string)
-                dt = datetime.fromisoformat(clean_date)
-                return dt.replace(tzinfo=timezone.utc)
-            else:
-                # Parse as-is and assume UTC
-                dt = datetime.fromisoformat(date_string)
-                return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
-        except:
-            return None
+
+def get_whois_client():
+    """Get the shared Cloudflare client, creating it on first use."""
+    global _client
+    if _client is None:
+        from cloudflare import AsyncCloudflare
+        _client = AsyncCloudflare(
+            api_token=CLOUDFLARE_API_TOKEN,
+            timeout=WHOIS_TIMEOUT
+        )
+    return _client
 
 
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle datetime objects."""
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+class WhoisUpstreamBusy(Exception):
+    """Raised when Cloudflare answers with a rate limit or server error."""
 
+    def __init__(self, status_code: int):
+        super().__init__(f"Cloudflare returned HTTP {status_code}")
+        self.status_code = status_code
 
 def validate_domain(domain: str) -> bool:
     """Validate domain name format."""
@@ -107,23 +91,50 @@ def normalize_domain(domain: str) -> str:
     return domain
 
 
-def checkWhois(domain: str) -> Optional[Dict[str, Any]]:
-    """Get whois information for a domain."""
-    try:
-        # Normalize and validate domain
-        normalized_domain = normalize_domain(domain)
-        
-        if not validate_domain(normalized_domain):
-            print(f"Invalid domain format: {domain}")
+async def checkWhois(domain: str) -> Optional[Dict[str, Any]]:
+    """Get whois information for a domain, served from the shared cache when fresh."""
+    # Normalize and validate domain
+    normalized_domain = normalize_domain(domain)
+    
+    if not validate_domain(normalized_domain):
+        print(f"Invalid domain format: {domain}")
+        return None
+    
+    cached = whois_cache.get(normalized_domain)
+    if cached is MISSING:
+        try:
+            cached = await _lookup_whois(normalized_domain)
+        except WhoisUpstreamBusy as e:
+            # Don't cache overload errors; slow the background refreshes down instead
+            delay = refresh_limiter.backoff()
+            print(f"Whois upstream busy for {normalized_domain} ({e}), backing off refreshes for {delay:.0f}s")
             return None
         
+        refresh_limiter.reset_backoff()
+        # Failed lookups are cached too, for a shorter time
+        whois_cache.set(normalized_domain, cached)
+    
+    # Hand out copies so callers can't modify the cached entry
+    return dict(cached) if cached else None
+
+
+async def _lookup_whois(normalized_domain: str) -> Optional[Dict[str, Any]]:
+    """Fetch whois information from Cloudflare without blocking the event loop."""
+    client = get_whois_client()
+    from cloudflare import APIStatusError
+    
+    try:
         # URL encode the domain for API call
         encoded_domain = quote(normalized_domain)
         
-        whois = client.intel.whois.get(
-            account_id=CLOUDFLARE_ACCOUNT_ID,
-            domain=encoded_domain
-        )
+        async with whois_semaphore:
+            whois = await asyncio.wait_for(
+                client.intel.whois.get(
+                    account_id=CLOUDFLARE_ACCOUNT_ID,
+                    domain=encoded_domain
+                ),
+                timeout=WHOIS_TIMEOUT
+            )
         
         # Create result dict with safe attribute access
         result = {
@@ -227,222 +238,215 @@ def checkWhois(domain: str) -> Optional[Dict[str, Any]]:
         
         return result
         
+    except asyncio.TimeoutError:
+        print(f"Timed out checking whois for {normalized_domain}")
+        return None
+    except APIStatusError as e:
+        if e.status_code == 429 or e.status_code >= 500:
+            raise WhoisUpstreamBusy(e.status_code) from e
+        print(f"Error checking whois for {normalized_domain}: {e}")
+        return None
     except Exception as e:
-        print(f"Error checking whois for {domain}: {e}")
+        print(f"Error checking whois for {normalized_domain}: {e}")
         return None
 
 
-def load_monitors() -> Dict[str, List[Dict]]:
-    """Load domain monitors from file."""
-    if not os.path.exists(MONITOR_FILE):
-        return {}
-    
-    try:
-        with open(MONITOR_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+def build_monitor_record(domain: str, domain_info: Dict[str, Any]) -> MonitorRecord:
+    """Build the stored monitor record for a domain from its whois info."""
+    now = int(time.time())
+    record = MonitorRecord.from_whois(normalize_domain(domain), domain_info, now)
+    record.next_check_epoch = next_check_time(record.expiration_epoch, now)
+    return record
 
 
-def save_monitors(monitors: Dict[str, List[Dict]]):
-    """Save domain monitors to file."""
-    try:
-        with open(MONITOR_FILE, 'w', encoding='utf-8') as f:
-            json.dump(monitors, f, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
-    except Exception as e:
-        print(f"Error saving monitors: {e}")
+def add_domain_monitor(domain: str, user_id: int, domain_info: Dict[str, Any]) -> Tuple[bool, Dict[str, List[MonitorRecord]]]:
+    """
+    Add a domain to monitoring list for a user.
+    Returns False if the domain already exists for this user, along with any
+    whois changes the lookup found for the domain's existing subscribers.
+    """
+    record = build_monitor_record(domain, domain_info)
+    changed_domains = save_known_domains([record])
+    return get_store().add_subscription(str(user_id), record), changed_domains
 
 
-def add_domain_monitor(domain: str, user_id: int, domain_info: Dict[str, Any]) -> bool:
-    """Add a domain to monitoring list for a user."""
-    monitors = load_monitors()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in monitors:
-        monitors[user_id_str] = []
-    
-    # Normalize domain for consistent storage
-    normalized_domain = normalize_domain(domain)
-    
-    # Check if domain already exists for this user
-    for existing_domain in monitors[user_id_str]:
-        if existing_domain['domain'].lower() == normalized_domain.lower():
-            return False  # Domain already exists
-    
-    # Add new domain - ensure all datetime fields are strings
-    monitor_data = {
-        "domain": normalized_domain,  # Use normalized domain
-        "added_date": datetime.now().isoformat(),
-        "expiration_date": domain_info.get('expiration_date'),
-        "creation_date": domain_info.get('creation_date'),
-        "updated_date": domain_info.get('updated_date'),
-        "registrar": domain_info.get('registrar'),
-        "registrant_organization": domain_info.get('registrant_organization'),
-        "registrant_country": domain_info.get('registrant_country'),
-        "name_servers": domain_info.get('name_servers'),
-        "status": domain_info.get('status'),
-        "dnssec": domain_info.get('dnssec'),
-        "last_checked": datetime.now().isoformat()
-    }
-    
-    monitors[user_id_str].append(monitor_data)
-    save_monitors(monitors)
-    return True
+def add_domain_monitors(user_id: int, domain_infos: List[Dict[str, Any]]) -> Tuple[int, Dict[str, List[MonitorRecord]]]:
+    """
+    Add several looked-up domains for a user in one transaction, returning how many
+    were new and any whois changes found for already monitored domains.
+    """
+    records = [build_monitor_record(domain_info['domain'], domain_info) for domain_info in domain_infos]
+    changed_domains = save_known_domains(records)
+    return get_store().add_subscriptions(str(user_id), records), changed_domains
+
+
+def save_known_domains(records: List[MonitorRecord]) -> Dict[str, List[MonitorRecord]]:
+    """
+    Run freshly looked-up records of already monitored domains through change
+    detection, as a refresh would, instead of overwriting their rows.
+    Returns the changed domains grouped by their existing subscribers.
+    """
+    store = get_store()
+    stored = store.get_domains(record.domain for record in records)
+    refreshed = []
+    for record in records:
+        previous = stored.get(record.domain)
+        if previous is not None:
+            detect_changes(record, previous)
+            refreshed.append(record)
+    return group_by_subscriber(save_refreshed_domains(refreshed))
+
+
+def group_by_subscriber(records: List[MonitorRecord]) -> Dict[str, List[MonitorRecord]]:
+    """Group records by the users subscribed to their domains."""
+    grouped = {}
+    subscribers = get_store().get_subscribers(record.domain for record in records)
+    for record in records:
+        for subscriber_id in subscribers[record.domain]:
+            grouped.setdefault(subscriber_id, []).append(record)
+    return grouped
+
+
+def iter_domain_list(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Stream domains out of a txt or CSV file, one (raw, normalized) pair per row.
+    The first cell of each row is used; blank rows, comments and a header row are skipped.
+    """
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        raw = row[0].strip()
+        if not raw or raw.startswith('#') or raw.lower() == 'domain':
+            continue
+        yield raw, normalize_domain(raw)
 
 
 def remove_domain_monitor(domain: str, user_id: int) -> bool:
     """Remove a domain from monitoring list for a user."""
-    monitors = load_monitors()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in monitors:
-        return False
-    
     # Normalize domain for consistent comparison
     normalized_domain = normalize_domain(domain)
     
-    original_length = len(monitors[user_id_str])
-    monitors[user_id_str] = [
-        d for d in monitors[user_id_str] 
-        if d['domain'].lower() != normalized_domain.lower()
-    ]
-    
-    if len(monitors[user_id_str]) < original_length:
-        save_monitors(monitors)
-        return True
-    
-    return False
+    return get_store().remove_subscription(str(user_id), normalized_domain)
 
 
-def list_monitored_domains(user_id: int) -> List[Dict[str, Any]]:
+def list_monitored_domains(user_id: int) -> List[MonitorRecord]:
     """Get all monitored domains for a user."""
-    monitors = load_monitors()
-    user_id_str = str(user_id)
-    
-    return monitors.get(user_id_str, [])
+    return get_store().list_user_domains(str(user_id))
 
 
-def update_domain_info(domain_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Update domain information by checking whois."""
-    domain = domain_data['domain']
-    fresh_info = checkWhois(domain)
+async def update_domain_info(record: MonitorRecord) -> MonitorRecord:
+    """
+    Update domain information by checking whois.
+    If tracked fields changed, record.changes lists what changed.
+    """
+    fresh_info = await checkWhois(record.domain)
+    now = int(time.time())
     
     if fresh_info:
-        domain_data['expiration_date'] = fresh_info.get('expiration_date')
-        domain_data['creation_date'] = fresh_info.get('creation_date')
-        domain_data['updated_date'] = fresh_info.get('updated_date')
-        domain_data['registrar'] = fresh_info.get('registrar')
-        domain_data['registrant_organization'] = fresh_info.get('registrant_organization')
-        domain_data['registrant_country'] = fresh_info.get('registrant_country')
-        domain_data['name_servers'] = fresh_info.get('name_servers')
-        domain_data['status'] = fresh_info.get('status')
-        domain_data['dnssec'] = fresh_info.get('dnssec')
-        domain_data['last_checked'] = datetime.now().isoformat()
+        previous = copy.copy(record)
+        record.apply_whois(fresh_info, now)
+        record.next_check_epoch = next_check_time(record.expiration_epoch, now)
+        detect_changes(record, previous)
+    else:
+        record.next_check_epoch = now + jittered(RETRY_DELAY)
     
-    return domain_data
+    return record
+
+
+def detect_changes(record: MonitorRecord, previous: MonitorRecord):
+    """Set record.changes if its tracked fields differ from `previous`."""
+    if previous.fingerprint is not None and record.fingerprint != previous.fingerprint:
+        record.changes = record.describe_changes(previous)
+        record.previous_fingerprint = previous.fingerprint
 
 
-def check_expiring_domains() -> Dict[str, List[Dict[str, Any]]]:
-    """Check for domains expiring in the next 7 days."""
-    monitors = load_monitors()
+def save_refreshed_domains(records: List[MonitorRecord]) -> List[MonitorRecord]:
+    """
+    Persist refreshed records, returning the ones whose whois data changed.
+    Changes are only written over the data they were detected against, so when
+    two instances see the same change, only the one that saves it first reports it.
+    Unchanged domains only get their check times written.
+    """
+    store = get_store()
+    changed = store.update_domains(record for record in records if record.changes)
+    store.update_schedules(record for record in records if not record.changes)
+    return changed
+
+
+def get_expiring_domains(days: int = 7, user_id: Optional[int] = None) -> Dict[str, List[MonitorRecord]]:
+    """
+    Get monitored domains expiring within the next `days` days, grouped by user.
+    Uses the store's expiry index, so only near-expiry domains are touched.
+    """
+    current_epoch = int(time.time())
+    # days_until_expiry is whole days remaining, so "within 7 days" means < 8 full days
+    end_epoch = current_epoch + (days + 1) * SECONDS_PER_DAY
     expiring_domains = {}
-    current_time = datetime.now()
     
-    for user_id, domains in monitors.items():
-        user_expiring = []
-        
-        for domain_data in domains:
-            # Update domain info if it's been more than 24 hours since last check
-            try:
-                last_checked = datetime.fromisoformat(domain_data['last_checked'])
-                if (current_time - last_checked).days >= 1:
-                    domain_data = update_domain_info(domain_data)
-            except:
-                domain_data = update_domain_info(domain_data)
-            
-            expiration_date = domain_data.get('expiration_date')
-            if expiration_date:
-                parsed_date = parse_iso_datetime(expiration_date)
-                if parsed_date:
-                    try:
-                        # Ensure both dates are timezone-aware for proper comparison
-                        current_time_utc = current_time.replace(tzinfo=timezone.utc) if current_time.tzinfo is None else current_time
-                        parsed_date_utc = parsed_date.replace(tzinfo=timezone.utc) if parsed_date.tzinfo is None else parsed_date
-                        
-                        days_until_expiry = (parsed_date_utc - current_time_utc).days
-                        
-                        if 0 <= days_until_expiry <= 7:
-                            # Create a copy of domain_data and add days_until_expiry as integer
-                            notification_data = domain_data.copy()
-                            notification_data['days_until_expiry'] = days_until_expiry
-                            user_expiring.append(notification_data)
-                    except Exception as e:
-                        print(f"Error calculating expiry days for {domain_data['domain']}: {e}")
-                else:
-                    print(f"Could not parse expiration date for {domain_data['domain']}: {expiration_date}")
-        
-        if user_expiring:
-            expiring_domains[user_id] = user_expiring
+    subscriptions = get_store().get_expiring_subscriptions(
+        current_epoch, end_epoch, str(user_id) if user_id is not None else None
+    )
+    for subscriber_id, record in subscriptions:
+        record.days_until_expiry = (record.expiration_epoch - current_epoch) // SECONDS_PER_DAY
+        expiring_domains.setdefault(subscriber_id, []).append(record)
     
-    # Save updated monitor data
-    save_monitors(monitors)
     return expiring_domains
 
 
-def get_expiring_domains_without_update() -> Dict[str, List[Dict[str, Any]]]:
-    """Get expiring domains without updating the data (for startup check)."""
-    monitors = load_monitors()
-    expiring_domains = {}
-    current_time = datetime.now()
+async def refresh_due_domains() -> Dict[str, List[MonitorRecord]]:
+    """
+    Refresh the domains that are due for a check.
+    Returns the domains whose whois data changed, grouped by subscribed user.
+    """
+    store = get_store()
     
-    for user_id, domains in monitors.items():
-        user_expiring = []
-        
-        for domain_data in domains:
-            expiration_date = domain_data.get('expiration_date')
-            if expiration_date:
-                parsed_date = parse_iso_datetime(expiration_date)
-                if parsed_date:
-                    try:
-                        # Ensure both dates are timezone-aware for proper comparison
-                        current_time_utc = current_time.replace(tzinfo=timezone.utc) if current_time.tzinfo is None else current_time
-                        parsed_date_utc = parsed_date.replace(tzinfo=timezone.utc) if parsed_date.tzinfo is None else parsed_date
-                        
-                        days_until_expiry = (parsed_date_utc - current_time_utc).days
-                        
-                        if 0 <= days_until_expiry <= 7:
-                            # Create a copy of domain_data and add days_until_expiry as integer
-                            notification_data = domain_data.copy()
-                            notification_data['days_until_expiry'] = days_until_expiry
-                            user_expiring.append(notification_data)
-                    except Exception as e:
-                        print(f"Error calculating expiry days for {domain_data['domain']}: {e}")
-                else:
-                    print(f"Could not parse expiration date for {domain_data['domain']}: {expiration_date}")
-        
-        if user_expiring:
-            expiring_domains[user_id] = user_expiring
+    # Each distinct domain has its own next check time, set from its distance
+    # to expiry; only the due ones are refreshed, once for all subscribers.
+    # Take about one tick's worth of work at the target rate, so refreshes are
+    # spread evenly across the interval instead of firing in one burst.
+    # The batch is leased, so instances sharing the database split the work.
+    batch_size = min(MONITOR_REFRESH_BATCH, max(1, int(MONITOR_REFRESH_RATE * MONITOR_TICK_MINUTES)))
+    due_domains = store.lease_due_domains(int(time.time()), batch_size, int(MONITOR_LEASE_MINUTES * 60))
     
-    return expiring_domains
+    refreshes = []
+    for record in due_domains:
+        await refresh_limiter.acquire()
+        refreshes.append(asyncio.create_task(update_domain_info(record)))
+    await asyncio.gather(*refreshes)
+    return group_by_subscriber(save_refreshed_domains(due_domains))
 
 
-def get_all_monitored_domains() -> Dict[str, List[Dict[str, Any]]]:
+async def check_expiring_domains() -> Dict[str, List[MonitorRecord]]:
+    """Refresh the domains that are due for a check, then get those expiring in the next 7 days."""
+    await refresh_due_domains()
+    return get_expiring_domains()
+
+
+def prioritize_user_domains(user_id: int) -> int:
+    """
+    Move a user's domains ahead of every other domain in the refresh queue,
+    overdue ones included, returning how many moved.
+    """
+    return get_store().prioritize_user_domains(str(user_id), int(time.time()))
+
+
+def get_expiring_domains_without_update() -> Dict[str, List[MonitorRecord]]:
+    """Get expiring domains without updating the data (for startup check)."""
+    return get_expiring_domains()
+
+
+def get_all_monitored_domains() -> Dict[str, List[MonitorRecord]]:
     """Get all monitored domains across all users."""
-    return load_monitors()
+    return get_store().get_all_subscriptions()
 
 
-def refresh_domain_info(domain: str, user_id: int) -> bool:
+async def refresh_domain_info(domain: str, user_id: int) -> bool:
     """Refresh domain information for a specific domain."""
-    monitors = load_monitors()
-    user_id_str = str(user_id)
+    record = get_store().get_user_domain(str(user_id), normalize_domain(domain))
     
-    if user_id_str not in monitors:
+    if not record:
         return False
     
-    for i, domain_data in enumerate(monitors[user_id_str]):
-        if domain_data['domain'].lower() == domain.lower():
-            monitors[user_id_str][i] = update_domain_info(domain_data)
-            save_monitors(monitors)
-            return True
-    
-    return False
+    record = await update_domain_info(record)
+    save_refreshed_domains([record])
+    return True
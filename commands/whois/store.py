@@ -0,0 +1,578 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Iterable
+
+from ..utils import MONITOR_DB
+from .dates import to_epoch
+from .record import MonitorRecord
+from .scheduler import next_check_time
+
+# Seconds to wait for another instance's write lock before giving up. Store
+# calls run on the event loop, so this bounds how long one can stall it
+SQLITE_BUSY_TIMEOUT = 5
+
+# Check time given to prioritized domains; real check times are never below 0
+PRIORITY_CHECK_EPOCH = -1
+
+# Legacy JSON file used before the SQLite store existed
+LEGACY_MONITOR_FILE = "domain_monitors.json"
+
+# Record columns stored once per domain and shared by every subscriber
+RECORD_COLUMNS = (
+    "expiration_epoch",
+    "creation_epoch",
+    "updated_epoch",
+    "checked_epoch",
+    "next_check_epoch",
+    "registrar",
+    "registrant_organization",
+    "registrant_country",
+    "name_servers",
+    "status",
+    "dnssec",
+    "fingerprint",
+)
+
+
+def _add_expiration_epoch(conn: sqlite3.Connection):
+    """Index expiry by epoch seconds so expiry scans become range queries."""
+    conn.execute("ALTER TABLE domains ADD COLUMN expiration_epoch INTEGER")
+    rows = conn.execute("SELECT domain, expiration_date FROM domains").fetchall()
+    conn.executemany(
+        "UPDATE domains SET expiration_epoch = ? WHERE domain = ?",
+        [(to_epoch(expiration_date), domain) for domain, expiration_date in rows]
+    )
+    # ISO strings with mixed offsets don't sort chronologically
+    conn.execute("DROP INDEX IF EXISTS idx_domains_expiration")
+    conn.execute("CREATE INDEX idx_domains_expiration_epoch ON domains(expiration_epoch)")
+
+
+def _add_next_check_epoch(conn: sqlite3.Connection):
+    """Give every domain a scheduled next check, indexed as a priority queue."""
+    conn.execute("ALTER TABLE domains ADD COLUMN next_check_epoch INTEGER NOT NULL DEFAULT 0")
+    rows = conn.execute("SELECT domain, expiration_epoch, last_checked FROM domains").fetchall()
+    updates = []
+    for domain, expiration_epoch, last_checked in rows:
+        last_checked_epoch = to_epoch(last_checked)
+        if last_checked_epoch is not None:
+            updates.append((next_check_time(expiration_epoch, last_checked_epoch), domain))
+    conn.executemany("UPDATE domains SET next_check_epoch = ? WHERE domain = ?", updates)
+    conn.execute("DROP INDEX IF EXISTS idx_domains_last_checked")
+    conn.execute("CREATE INDEX idx_domains_next_check ON domains(next_check_epoch)")
+
+
+def _use_epoch_columns(conn: sqlite3.Connection):
+    """Store every date as epoch seconds, converted once here instead of on every read."""
+    # Left behind if an earlier attempt at this step was interrupted
+    conn.execute("DROP TABLE IF EXISTS domains_new")
+    conn.execute("DROP TABLE IF EXISTS subscriptions_new")
+    conn.execute(
+        "CREATE TABLE domains_new ("
+        "domain TEXT PRIMARY KEY, "
+        "expiration_epoch INTEGER, "
+        "creation_epoch INTEGER, "
+        "updated_epoch INTEGER, "
+        "checked_epoch INTEGER, "
+        "next_check_epoch INTEGER NOT NULL DEFAULT 0, "
+        "registrar TEXT, "
+        "registrant_organization TEXT, "
+        "registrant_country TEXT, "
+        "name_servers TEXT, "
+        "status TEXT, "
+        "dnssec TEXT)"
+    )
+    rows = conn.execute(
+        "SELECT domain, expiration_epoch, creation_date, updated_date, last_checked, next_check_epoch, "
+        "registrar, registrant_organization, registrant_country, name_servers, status, dnssec FROM domains"
+    ).fetchall()
+    conn.executemany(
+        "INSERT INTO domains_new VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (domain, expiration_epoch, to_epoch(creation_date), to_epoch(updated_date), to_epoch(last_checked),
+             next_check_epoch, *rest)
+            for domain, expiration_epoch, creation_date, updated_date, last_checked, next_check_epoch, *rest in rows
+        ]
+    )
+    conn.execute("DROP TABLE domains")
+    conn.execute("ALTER TABLE domains_new RENAME TO domains")
+    conn.execute("CREATE INDEX idx_domains_expiration_epoch ON domains(expiration_epoch)")
+    conn.execute("CREATE INDEX idx_domains_next_check ON domains(next_check_epoch)")
+
+    conn.execute(
+        "CREATE TABLE subscriptions_new ("
+        "user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE, "
+        "domain TEXT NOT NULL REFERENCES domains(domain) ON DELETE CASCADE, "
+        "added_epoch INTEGER, "
+        "PRIMARY KEY (user_id, domain))"
+    )
+    rows = conn.execute("SELECT user_id, domain, added_date FROM subscriptions").fetchall()
+    conn.executemany(
+        "INSERT INTO subscriptions_new VALUES (?, ?, ?)",
+        [(user_id, domain, to_epoch(added_date)) for user_id, domain, added_date in rows]
+    )
+    conn.execute("DROP TABLE subscriptions")
+    conn.execute("ALTER TABLE subscriptions_new RENAME TO subscriptions")
+    conn.execute("CREATE INDEX idx_subscriptions_domain ON subscriptions(domain)")
+
+
+def _add_fingerprint(conn: sqlite3.Connection):
+    """Fingerprint each domain's tracked whois fields so refreshes can detect changes."""
+    conn.execute("ALTER TABLE domains ADD COLUMN fingerprint TEXT")
+    rows = conn.execute(
+        "SELECT domain, expiration_epoch, registrar, registrant_organization, registrant_country, "
+        "name_servers, status, dnssec FROM domains"
+    ).fetchall()
+
+    # A frozen copy of MonitorRecord.compute_fingerprint as of this migration,
+    # so later changes to the record can't change what this step writes
+    def json_tuple(value):
+        return tuple(str(item) for item in json.loads(value)) if value else ()
+
+    def fingerprint(row) -> str:
+        values = (
+            row["expiration_epoch"],
+            row["registrar"],
+            row["registrant_organization"],
+            row["registrant_country"],
+            json_tuple(row["name_servers"]),
+            json_tuple(row["status"]),
+            row["dnssec"],
+        )
+        return hashlib.blake2b(repr(values).encode(), digest_size=8).hexdigest()
+
+    conn.executemany(
+        "UPDATE domains SET fingerprint = ? WHERE domain = ?",
+        [(fingerprint(row), row["domain"]) for row in rows]
+    )
+
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS domains (
+        domain TEXT PRIMARY KEY,
+        expiration_date TEXT,
+        creation_date TEXT,
+        updated_date TEXT,
+        registrar TEXT,
+        registrant_organization TEXT,
+        registrant_country TEXT,
+        name_servers TEXT,
+        status TEXT,
+        dnssec TEXT,
+        last_checked TEXT
+    );
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY
+    );
+    -- The primary key doubles as the per-user index (user_id is its leading column)
+    CREATE TABLE IF NOT EXISTS subscriptions (
+        user_id TEXT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+        domain TEXT NOT NULL REFERENCES domains(domain) ON DELETE CASCADE,
+        added_date TEXT,
+        PRIMARY KEY (user_id, domain)
+    );
+    CREATE INDEX IF NOT EXISTS idx_subscriptions_domain ON subscriptions(domain);
+    CREATE INDEX IF NOT EXISTS idx_domains_expiration ON domains(expiration_date);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_domains_last_checked ON domains(last_checked);
+    """,
+    _add_expiration_epoch,
+    _add_next_check_epoch,
+    """
+    CREATE TABLE IF NOT EXISTS notifications (
+        user_id TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        days_left INTEGER NOT NULL,
+        expires_epoch INTEGER NOT NULL,
+        PRIMARY KEY (user_id, domain, days_left)
+    );
+    CREATE INDEX IF NOT EXISTS idx_notifications_expires ON notifications(expires_epoch);
+    """,
+    _use_epoch_columns,
+    _add_fingerprint,
+    # Price watch tables, now created by commands/domain/store.py
+    "",
+    """
+    -- Refresh leases, kept apart from the schedule so prioritizing can't release them
+    ALTER TABLE domains ADD COLUMN lease_until INTEGER NOT NULL DEFAULT 0;
+    """,
+]
+
+
+def _split_statements(script: str) -> List[str]:
+    """Split a migration script into its SQL statements."""
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def _record_values(record: MonitorRecord) -> list:
+    """Get a record's column values in RECORD_COLUMNS order."""
+    return [
+        record.expiration_epoch,
+        record.creation_epoch,
+        record.updated_epoch,
+        record.checked_epoch,
+        # Domains without a schedule are due immediately
+        record.next_check_epoch or 0,
+        record.registrar,
+        record.registrant_organization,
+        record.registrant_country,
+        json.dumps(record.name_servers, ensure_ascii=False) if record.name_servers else None,
+        json.dumps(record.status, ensure_ascii=False) if record.status else None,
+        record.dnssec,
+        record.fingerprint,
+    ]
+
+
+class MonitorStore:
+    """SQLite-backed storage for monitored domains and user subscriptions."""
+
+    def __init__(self, path: str = MONITOR_DB, legacy_file: Optional[str] = LEGACY_MONITOR_FILE):
+        self.path = path
+        # Other bot instances may hold the write lock briefly, so wait for it.
+        # Transactions are opened explicitly with _transaction(), never implicitly
+        self.conn = sqlite3.connect(
+            path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None
+        )
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # Migrations rebuild tables, so foreign keys are only enforced afterwards
+        self._migrate()
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        if legacy_file:
+            self._import_legacy_json(legacy_file)
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run a block in one write transaction, committed on success and rolled back on error.
+        BEGIN IMMEDIATE takes the write lock up front, so instances sharing the
+        database queue for it instead of failing to upgrade a read lock.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.conn.execute("COMMIT")
+        except BaseException:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+            raise
+
+    def _migrate(self):
+        """
+        Apply any schema migrations the database hasn't seen yet.
+        The version is read and bumped in the same transaction as the steps, so
+        instances starting together apply each step exactly once.
+        """
+        with self._transaction():
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for migration in MIGRATIONS[version:]:
+                if callable(migration):
+                    migration(self.conn)
+                else:
+                    # executescript would commit first, so statements run one by one
+                    for statement in _split_statements(migration):
+                        self.conn.execute(statement)
+            self.conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+
+    def _import_legacy_json(self, legacy_file: str):
+        """Import monitors from the old JSON file once, then set it aside."""
+        if not os.path.exists(legacy_file):
+            return
+
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                monitors = json.load(f)
+        except Exception as e:
+            print(f"Error reading legacy monitor file {legacy_file}: {e}")
+            return
+
+        with self._transaction():
+            for user_id, domains in monitors.items():
+                for domain_data in domains:
+                    record = MonitorRecord.from_legacy(domain_data)
+                    self._upsert_domain(record, keep_newer=True)
+                    self._insert_subscription(user_id, record.domain, record.added_epoch)
+
+        try:
+            os.replace(legacy_file, legacy_file + ".migrated")
+        except FileNotFoundError:
+            # Another instance imported the same file at the same time; the import is idempotent
+            return
+        print(f"Migrated {len(monitors)} users from {legacy_file} to {self.path}")
+
+    def _upsert_domain(self, record: MonitorRecord, keep_newer: bool = False):
+        """Insert or update a domain row."""
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in RECORD_COLUMNS)
+        condition = ""
+        if keep_newer:
+            # Only overwrite with data that was checked more recently
+            condition = " WHERE COALESCE(excluded.checked_epoch, 0) >= COALESCE(domains.checked_epoch, 0)"
+        self.conn.execute(
+            f"INSERT INTO domains (domain, {', '.join(RECORD_COLUMNS)}) "
+            f"VALUES (?{', ?' * len(RECORD_COLUMNS)}) "
+            f"ON CONFLICT(domain) DO UPDATE SET {assignments}{condition}",
+            [record.domain, *_record_values(record)]
+        )
+
+    def _insert_domain(self, record: MonitorRecord) -> bool:
+        """Insert a domain row unless the domain is already stored, returning whether it was inserted."""
+        cursor = self.conn.execute(
+            f"INSERT INTO domains (domain, {', '.join(RECORD_COLUMNS)}) "
+            f"VALUES (?{', ?' * len(RECORD_COLUMNS)}) "
+            f"ON CONFLICT(domain) DO NOTHING",
+            [record.domain, *_record_values(record)]
+        )
+        return cursor.rowcount > 0
+
+    def _insert_subscription(self, user_id: str, domain: str, added_epoch: Optional[int]) -> bool:
+        """Insert a subscription, returning False if it already exists."""
+        self.conn.execute("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (user_id,))
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO subscriptions (user_id, domain, added_epoch) VALUES (?, ?, ?)",
+            (user_id, domain, added_epoch or int(time.time()))
+        )
+        return cursor.rowcount > 0
+
+    def add_subscription(self, user_id: str, record: MonitorRecord) -> bool:
+        """
+        Subscribe a user to a domain, storing its whois data if the domain is new.
+        An already monitored domain keeps its row; fresh data for it goes through
+        change detection instead, so its subscribers hear about changes.
+        """
+        with self._transaction():
+            self._insert_domain(record)
+            return self._insert_subscription(user_id, record.domain, record.added_epoch)
+
+    def add_subscriptions(self, user_id: str, records: Iterable[MonitorRecord]) -> int:
+        """Subscribe a user to many domains in one transaction, returning how many were new."""
+        added = 0
+        with self._transaction():
+            for record in records:
+                self._insert_domain(record)
+                if self._insert_subscription(user_id, record.domain, record.added_epoch):
+                    added += 1
+        return added
+
+    def get_domains(self, domains: Iterable[str]) -> Dict[str, MonitorRecord]:
+        """Get the stored records of the given domains that are monitored."""
+        domains = list(domains)
+        records = {}
+        # Stay well under SQLite's limit on bound parameters
+        for start in range(0, len(domains), 500):
+            chunk = domains[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT * FROM domains WHERE domain IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in rows:
+                records[row["domain"]] = MonitorRecord.from_row(row)
+        return records
+
+    def get_user_domain_names(self, user_id: str) -> set:
+        """Get the names of every domain a user is subscribed to."""
+        rows = self.conn.execute("SELECT domain FROM subscriptions WHERE user_id = ?", (user_id,))
+        return {row["domain"] for row in rows}
+
+    def remove_subscription(self, user_id: str, domain: str) -> bool:
+        """Unsubscribe a user from a domain, dropping the domain once unused."""
+        with self._transaction():
+            cursor = self.conn.execute(
+                "DELETE FROM subscriptions WHERE user_id = ? AND domain = ?",
+                (user_id, domain)
+            )
+            if cursor.rowcount == 0:
+                return False
+            self.conn.execute(
+                "DELETE FROM domains WHERE domain = ? "
+                "AND NOT EXISTS (SELECT 1 FROM subscriptions WHERE domain = ?)",
+                (domain, domain)
+            )
+            return True
+
+    def list_user_domains(self, user_id: str) -> List[MonitorRecord]:
+        """Get every domain a user is subscribed to."""
+        rows = self.conn.execute(
+            "SELECT s.added_epoch, d.* FROM subscriptions s "
+            "JOIN domains d ON d.domain = s.domain "
+            "WHERE s.user_id = ? ORDER BY s.added_epoch",
+            (user_id,)
+        ).fetchall()
+        return [MonitorRecord.from_row(row) for row in rows]
+
+    def get_user_domain(self, user_id: str, domain: str) -> Optional[MonitorRecord]:
+        """Get a single subscribed domain for a user."""
+        row = self.conn.execute(
+            "SELECT s.added_epoch, d.* FROM subscriptions s "
+            "JOIN domains d ON d.domain = s.domain "
+            "WHERE s.user_id = ? AND s.domain = ?",
+            (user_id, domain)
+        ).fetchone()
+        return MonitorRecord.from_row(row) if row else None
+
+    def get_all_subscriptions(self) -> Dict[str, List[MonitorRecord]]:
+        """Get every subscription grouped by user."""
+        monitors = {}
+        rows = self.conn.execute(
+            "SELECT s.user_id, s.added_epoch, d.* FROM subscriptions s "
+            "JOIN domains d ON d.domain = s.domain "
+            "ORDER BY s.user_id, s.added_epoch"
+        )
+        for row in rows:
+            monitors.setdefault(row["user_id"], []).append(MonitorRecord.from_row(row))
+        return monitors
+
+    def get_expiring_subscriptions(self, start_epoch: int, end_epoch: int,
+                                   user_id: Optional[str] = None) -> List[tuple]:
+        """
+        Get (user_id, record) pairs for domains expiring in [start_epoch, end_epoch).
+        Walks the expiry index, so cost is proportional to the number of matches.
+        """
+        query = (
+            "SELECT s.user_id, s.added_epoch, d.* FROM domains d "
+            "JOIN subscriptions s ON s.domain = d.domain "
+            "WHERE d.expiration_epoch >= ? AND d.expiration_epoch < ?"
+        )
+        params = [start_epoch, end_epoch]
+        if user_id is not None:
+            query += " AND s.user_id = ?"
+            params.append(user_id)
+        query += " ORDER BY d.expiration_epoch"
+
+        results = []
+        for row in self.conn.execute(query, params):
+            results.append((row["user_id"], MonitorRecord.from_row(row)))
+        return results
+
+    def lease_due_domains(self, now: int, limit: int, lease_seconds: int) -> List[MonitorRecord]:
+        """
+        Pop the domains whose next check is due, earliest first, taking a lease on them.
+        The next_check_epoch index makes this a priority-queue read rather than a sweep.
+        Leased domains are skipped by other instances sharing the database until
+        their refresh is saved, or until the lease runs out if this instance dies.
+        """
+        # The write lock is taken before reading, so two instances can never
+        # lease the same rows
+        with self._transaction():
+            rows = self.conn.execute(
+                "SELECT * FROM domains WHERE next_check_epoch <= ? AND lease_until <= ? "
+                "ORDER BY next_check_epoch LIMIT ?",
+                (now, now, limit)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE domains SET lease_until = ? WHERE domain = ?",
+                [(now + lease_seconds, row["domain"]) for row in rows]
+            )
+        return [MonitorRecord.from_row(row) for row in rows]
+
+    def prioritize_user_domains(self, user_id: str, now: int) -> int:
+        """
+        Put a user's domains at the front of the refresh queue without refreshing them directly.
+        They're scheduled at PRIORITY_CHECK_EPOCH, before any real check time, so
+        they come first even when many domains are overdue; leased ones are left alone.
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                "UPDATE domains SET next_check_epoch = ? "
+                "WHERE next_check_epoch > ? AND lease_until <= ? "
+                "AND domain IN (SELECT domain FROM subscriptions WHERE user_id = ?)",
+                (PRIORITY_CHECK_EPOCH, PRIORITY_CHECK_EPOCH, now, user_id)
+            )
+            return cursor.rowcount
+
+    def update_domains(self, records: Iterable[MonitorRecord]) -> List[MonitorRecord]:
+        """
+        Write changed whois data for several domains in one transaction, releasing their leases.
+        Each write only applies if the stored fingerprint is still the one the change
+        was detected against; returns the records that were written.
+        """
+        assignments = ", ".join(f"{column} = ?" for column in RECORD_COLUMNS)
+        written = []
+        with self._transaction():
+            for record in records:
+                cursor = self.conn.execute(
+                    f"UPDATE domains SET {assignments}, lease_until = 0 "
+                    f"WHERE domain = ? AND fingerprint IS ?",
+                    [*_record_values(record), record.domain, record.previous_fingerprint]
+                )
+                if cursor.rowcount > 0:
+                    written.append(record)
+        return written
+
+    def update_schedules(self, records: Iterable[MonitorRecord]):
+        """Write only the check times of domains whose whois data didn't change, releasing their leases."""
+        with self._transaction():
+            self.conn.executemany(
+                "UPDATE domains SET checked_epoch = ?, next_check_epoch = ?, lease_until = 0 WHERE domain = ?",
+                [(record.checked_epoch, record.next_check_epoch, record.domain) for record in records]
+            )
+
+    def get_subscribers(self, domains: Iterable[str]) -> Dict[str, List[str]]:
+        """Get the subscribed user IDs of each of the given domains."""
+        subscribers = {}
+        for domain in domains:
+            rows = self.conn.execute("SELECT user_id FROM subscriptions WHERE domain = ?", (domain,))
+            subscribers[domain] = [row["user_id"] for row in rows]
+        return subscribers
+
+    def claim_notifications(self, user_id: str, keys: Iterable[tuple], expires_epoch: int) -> List[tuple]:
+        """
+        Record (domain, days_left) notifications for a user in the dedup ledger.
+        Returns only the keys that weren't already recorded, i.e. the ones to send.
+        """
+        return self.claim_user_notifications({user_id: keys}, expires_epoch).get(user_id, [])
+
+    def claim_user_notifications(self, keys_by_user: Dict[str, Iterable[tuple]],
+                                 expires_epoch: int) -> Dict[str, List[tuple]]:
+        """Claim the (domain, days_left) keys of many users in one transaction, leaving out users with none new."""
+        claimed = {}
+        with self._transaction():
+            for user_id, keys in keys_by_user.items():
+                for domain, days_left in keys:
+                    cursor = self.conn.execute(
+                        "INSERT OR IGNORE INTO notifications (user_id, domain, days_left, expires_epoch) "
+                        "VALUES (?, ?, ?, ?)",
+                        (user_id, domain, days_left, expires_epoch)
+                    )
+                    if cursor.rowcount > 0:
+                        claimed.setdefault(user_id, []).append((domain, days_left))
+        return claimed
+
+    def release_notifications(self, user_id: str, keys: Iterable[tuple]):
+        """Remove (domain, days_left) claims for notifications that couldn't be delivered, so they're retried."""
+        with self._transaction():
+            self.conn.executemany(
+                "DELETE FROM notifications WHERE user_id = ? AND domain = ? AND days_left = ?",
+                [(user_id, domain, days_left) for domain, days_left in keys]
+            )
+
+    def prune_notifications(self, now: int) -> int:
+        """Delete expired dedup ledger entries, returning how many were removed."""
+        with self._transaction():
+            cursor = self.conn.execute("DELETE FROM notifications WHERE expires_epoch <= ?", (now,))
+            return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
+
+
+_store: Optional[MonitorStore] = None
+
+
+def get_store() -> MonitorStore:
+    """Get the shared monitor store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = MonitorStore()
+    return _store
@@ -8,7 +8,7 @@ async def zipcode_command(interaction: discord.Interaction, country: app_command
     await interaction.response.defer(ephemeral=True)
     
     if country.value == 'JP':
-        result = search_zipcode_jp(zipcodes)
+        result = await search_zipcode_jp(zipcodes)
         if result is None:
             await interaction.followup.send("Invalid zipcode.")
         else:
@@ -1,15 +1,13 @@
-import requests
 from typing import Optional, Dict
+from ..http_client import get_json, UpstreamError
 
 
-def searchZipCodeJP(zipcode: str) -> Optional[Dict[str, str]]:
+async def searchZipCodeJP(zipcode: str) -> Optional[Dict[str, str]]:
   base = "https://zipcloud.ibsnet.co.jp/api/search"
   params = {"zipcode": zipcode}
 
   try:
-    response = requests.get(base, params=params)
-    response.raise_for_status()
-    data = response.json()
+    data = await get_json(base, params=params)
     
     if data.get("status") == 200 and data.get("results"):
       result_data = data["results"][0]
@@ -25,7 +23,7 @@ def searchZipCodeJP(zipcode: str) -> Optional[Dict[str, str]]:
     
     return None
     
-  except requests.exceptions.RequestException as e:
+  except UpstreamError as e:
     print(f"Error in zipcode API request: {e}")
     return None
   except (KeyError, IndexError) as e:
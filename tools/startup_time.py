@@ -0,0 +1,50 @@
+"""
+Measure how long `import bot` takes, using Python's -X importtime report.
+
+Usage: python tools/startup_time.py [runs] [top]
+Prints the best total over `runs` imports and the `top` slowest modules by
+cumulative import time.
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times():
+    """Import bot in a fresh interpreter and return (module, self_us, cumulative_us) rows."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    best = None
+    for _ in range(runs):
+        rows = import_times()
+        total = next(cumulative for module, _, cumulative in rows if module.strip() == "bot")
+        if best is None or total < best[0]:
+            best = (total, rows)
+
+    total, rows = best
+    print(f"import bot: {total / 1000:.1f} ms (best of {runs})")
+    print(f"{'cumulative ms':>14}  module")
+    for module, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[:top]:
+        print(f"{cumulative / 1000:>14.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()